@@ -0,0 +1,204 @@
+"""Headless batch solver
+    Solves every level of one or more level directories (by default the bundled "Micro Cosmos" and
+    "Mini Cosmos" packs) or XSB/SOK collection files with a pool of worker processes and writes one row per level
+    to CSV and/or JSON.
+
+    Example:
+        python batch.py --algorithm astar --csv results.csv --json results.json
+        python batch.py "Mini Cosmos" --algorithm bfs --workers 4
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from solver import ALGORITHMS, FRONTIERS, Budget, LevelCollection, load_level, parse_level, read_level_text
+
+DEFAULT_PACKS = ["Micro Cosmos", "Mini Cosmos"]
+FIELDS = ["pack", "level", "source", "algorithm", "solved", "status", "steps", "expanded", "explored", "time", "path",
+          "stats"]
+
+
+def list_levels(directory):
+    """
+    List the level files of a directory
+    @param directory: a directory containing level files (*.txt)
+    @return: the sorted list of paths of the level files
+    """
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".txt"))
+
+
+def expand_packs(packs):
+    """
+    List the levels of the packs given on the command line
+    @param packs: a list of level directories, level files and collection files
+    @return: the list of levels: the path of a level file of a directory, or the tuple (file name, offset, title,
+    number) of a level of any other file, number being its position in the file (0 for the first, see
+    solver.LevelCollection)
+    """
+    levels = []
+    for pack in packs:
+        if os.path.isdir(pack):
+            levels.extend(list_levels(pack))
+        else:
+            levels.extend(entry + (n,) for n, entry in enumerate(LevelCollection(pack).entries))
+    return levels
+
+
+def solve_level(level_file, algorithm, options=None):
+    """
+    Solve one level. Runs in a worker process, so it only takes and returns picklable values.
+    @param level_file: path of the level file, or an entry of a collection file (see expand_packs)
+    @param algorithm: a key of solver.ALGORITHMS
+    @param options: a dictionary of keyword options passed to the search class
+    @return: a dictionary with the fields listed in FIELDS
+    """
+    if isinstance(level_file, tuple):
+        file_name, offset, title, n = level_file
+        matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(
+            read_level_text(file_name, offset).splitlines())
+        pack, level, source = os.path.basename(file_name), title, "%s#%d" % (file_name, n)
+    else:
+        matrix, num_row, num_col, box_pos, goal_pos, player_pos = load_level(level_file)
+        pack = os.path.basename(os.path.dirname(level_file))
+        level = os.path.splitext(os.path.basename(level_file))[0]
+        source = level_file
+    start = time.perf_counter()
+    search = ALGORITHMS[algorithm](num_row, num_col, matrix, box_pos, goal_pos, player_pos, **(options or {}))
+    path, expanded_num, explored_num = search.search()
+    elapsed = time.perf_counter() - start
+    solved = path not in (["Impossible"], ["Budget exceeded"])
+    return {
+        "pack": pack,
+        "level": level,
+        # where the level comes from: the path of its file, or "file#number" for a level of a collection file
+        "source": source,
+        "algorithm": algorithm,
+        "solved": solved,
+        "status": "solved" if solved else path[0].lower(),
+        "steps": len(path) if solved else None,
+        "expanded": expanded_num,
+        "explored": explored_num,
+        "time": round(elapsed, 6),
+        "path": "".join(path) if solved else "",
+        # counters and timers of the search when the stats option is on (see solver.SearchStats)
+        "stats": search.stats.as_dict() if getattr(search, "stats", None) else None,
+    }
+
+
+def solve_all(level_files, algorithm, options=None, workers=None, log=None):
+    """
+    Solve a list of levels across a process pool
+    @param level_files: list of levels (see expand_packs)
+    @param algorithm: a key of solver.ALGORITHMS
+    @param options: a dictionary of keyword options passed to the search class
+    @param workers: number of worker processes (None means one per CPU)
+    @param log: optional stream receiving one progress line per finished level
+    @return: the list of result dictionaries, in the order of level_files
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(solve_level, level_file, algorithm, options): level_file for level_file in level_files}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if log:
+                print("%s/%s: %s in %.3fs (expanded %d, explored %d)" % (
+                    result["pack"], result["level"], "%d steps" % result["steps"] if result["solved"] else result["status"],
+                    result["time"], result["expanded"], result["explored"]), file=log)
+    return [results[level_file] for level_file in level_files]
+
+
+def write_csv(results, file_name):
+    with open(file_name, "w", newline="") as f:
+        write_rows(results, f)
+
+
+def write_rows(results, f):
+    writer = csv.DictWriter(f, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows([dict(result, stats=json.dumps(result["stats"])) if result["stats"] else result
+                      for result in results])
+
+
+def write_json(results, file_name):
+    with open(file_name, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve whole Sokoban level packs without the GUI.")
+    parser.add_argument("packs", nargs="*", default=DEFAULT_PACKS,
+                        help="level directories, level files or collection files (default: the bundled packs)")
+    parser.add_argument("-a", "--algorithm", choices=sorted(ALGORITHMS), default="astar")
+    parser.add_argument("--packed", action="store_true", help="use the packed (bitmask) state representation")
+    parser.add_argument("--mode", choices=["step", "push"], default="step",
+                        help="expand one node per player step or per box push")
+    parser.add_argument("--corral", action="store_true",
+                        help="push mode only: prune corral deadlocks and restrict pushes to PI-corrals")
+    parser.add_argument("--macros", action="store_true",
+                        help="push mode only: push boxes through tunnels and into goal rooms as single moves")
+    parser.add_argument("--deadlock-db", metavar="DIR", default=None,
+                        help="directory of the learned deadlock patterns, shared by all runs of the same level")
+    parser.add_argument("--frontier", choices=sorted(FRONTIERS), default=None,
+                        help="frontier implementation (default: deque for bfs, heap for astar)")
+    parser.add_argument("--heuristic", choices=["distance", "manhattan", "matching"], default=None,
+                        help="astar, idastar and hdastar only: heuristic function (default: distance)")
+    parser.add_argument("--tt-size", type=int, default=None,
+                        help="astar only: maximum number of transposition table entries (evicted states are searched "
+                             "again: this bounds the table, not the memory)")
+    parser.add_argument("--cache-size", type=int, default=None,
+                        help="idastar only: maximum number of entries of the transposition cache (default: no cache)")
+    parser.add_argument("--hda-workers", type=int, default=None,
+                        help="hdastar only: worker processes of one search (default: CPU count)")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="portfolio only: seconds after which the remaining searches are stopped")
+    parser.add_argument("--best", action="store_true",
+                        help="portfolio only: keep the shortest solution found before the deadline, not the first")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds allowed to each search")
+    parser.add_argument("--node-limit", type=int, default=None, help="expanded nodes allowed to each search")
+    parser.add_argument("--memory-limit", type=float, default=None,
+                        help="megabytes of memory allowed to each search process")
+    parser.add_argument("--stats", action="store_true",
+                        help="collect the counters and timers of every search into the stats column (slower, not "
+                             "for portfolio)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--csv", help="write the results to this CSV file")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    level_files = expand_packs(args.packs)
+    options = {"packed": args.packed, "mode": args.mode, "frontier": args.frontier, "corral": args.corral,
+               "macros": args.macros}
+    if args.deadlock_db is not None:
+        options["deadlock_db"] = args.deadlock_db
+    if args.tt_size is not None:
+        options["tt_size"] = args.tt_size
+    if args.cache_size is not None:
+        options["cache_size"] = args.cache_size
+    if args.hda_workers is not None:
+        options["workers"] = args.hda_workers
+    if args.heuristic is not None:
+        options["heuristic"] = args.heuristic
+    if args.stats:
+        options["stats"] = True
+    if args.algorithm == "bidirectional":  # pulls only exist at the push level
+        options["mode"] = "push"
+    if args.algorithm == "portfolio":  # the configurations come with their own options
+        options = {"deadline": args.deadline, "best": args.best}
+    if args.time_limit is not None or args.node_limit is not None or args.memory_limit is not None:
+        options["budget"] = Budget(args.time_limit, args.node_limit,
+                                   None if args.memory_limit is None else int(args.memory_limit * 2 ** 20))
+    results = solve_all(level_files, args.algorithm, options, args.workers, log=sys.stderr)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.json:
+        write_json(results, args.json)
+    if not args.csv and not args.json:
+        write_rows(results, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""Benchmark suite
+    Runs named search configurations over level packs (by default the bundled "Micro Cosmos" and "Mini Cosmos")
+    with a fixed budget and repeated trials, and writes the wall time, the expanded and explored nodes, the nodes
+    per second and the peak memory of every level to JSON (and optionally CSV). A run can be compared against a
+    stored baseline: a level no longer solved, expanding more nodes than the baseline by more than the threshold, or
+    slower by more than the time threshold, is reported as a regression and the exit status is 1. The expanded nodes
+    don't depend on the machine, so their threshold can be tight; the times are the medians of the trials, and a
+    level only counts as slower when even its fastest trial is slower than the slowest trial of the baseline.
+
+    Every trial runs in a fresh worker process, so that the peak memory is the one of that trial only (Python 3.11
+    and later: before, a worker runs several trials and reports the peak of all of them). Use one worker (the
+    default) for stable timings.
+
+    Example:
+        python bench.py --trials 3 --time-limit 60 --json baseline.json
+        python bench.py --trials 3 --time-limit 60 --json run.json --baseline baseline.json --threshold 0.2
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from batch import DEFAULT_PACKS, expand_packs, solve_level
+from solver import Budget
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# configurations by name: (key of solver.ALGORITHMS, options of the search class)
+CONFIGS = {
+    "bfs": ("bfs", {"packed": True}),
+    "astar": ("astar", {"packed": True}),
+    "bfs-step": ("bfs", {}),
+    "astar-step": ("astar", {}),
+    "bfs-push": ("bfs", {"mode": "push"}),
+    "astar-push": ("astar", {"mode": "push"}),
+    "astar-matching": ("astar", {"mode": "push", "heuristic": "matching"}),
+    "astar-corral": ("astar", {"mode": "push", "corral": True, "macros": True}),
+    "bidirectional": ("bidirectional", {"mode": "push"}),
+    "idastar": ("idastar", {"mode": "push", "cache_size": 100000}),
+}
+DEFAULT_CONFIGS = ["bfs", "astar"]
+FIELDS = ["config", "pack", "level", "status", "steps", "expanded", "explored", "time", "time_min", "time_max",
+          "nodes_per_sec", "peak_memory"]
+
+
+def peak_memory():
+    """
+    @return: the peak resident set size of the process in bytes, None if it can't be measured
+    """
+    if resource is None:
+        return Budget.memory_usage()
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def run_trial(level_file, config, budget):
+    """
+    Solve a level once with a configuration. Runs in a fresh worker process.
+    @param level_file: path of the level file, or an entry of a collection file (see batch.expand_packs)
+    @param config: a key of CONFIGS
+    @param budget: a Budget, None for no limit
+    @return: the result dictionary of batch.solve_level, with the peak memory of the process
+    """
+    algorithm, options = CONFIGS[config]
+    options = dict(options, budget=budget) if budget is not None else options
+    result = solve_level(level_file, algorithm, options)
+    result["peak_memory"] = peak_memory()
+    return result
+
+
+def summarize(config, trials):
+    """
+    Merge the trials of a level: the search is deterministic, so the nodes come from the first trial and the times
+    are summarized by their median
+    @param config: a key of CONFIGS
+    @param trials: the results of run_trial for one level
+    @return: a dictionary with the fields listed in FIELDS
+    """
+    times = [trial["time"] for trial in trials]
+    first = trials[0]
+    median = statistics.median(times)
+    return {
+        "config": config,
+        "pack": first["pack"],
+        "level": first["level"],
+        "status": first["status"],
+        "steps": first["steps"],
+        "expanded": first["expanded"],
+        "explored": first["explored"],
+        "time": round(median, 6),
+        "time_min": min(times),
+        "time_max": max(times),
+        "nodes_per_sec": round(first["expanded"] / median) if median > 0 else None,
+        "peak_memory": max((trial["peak_memory"] or 0) for trial in trials) or None,
+    }
+
+
+def run_benchmark(level_files, configs, trials=1, budget=None, workers=1, log=None):
+    """
+    Run every configuration on every level, trials times
+    @param level_files: list of levels (see batch.expand_packs)
+    @param configs: list of keys of CONFIGS
+    @param trials: the number of runs of each level
+    @param budget: a Budget applied to every run, None for no limit
+    @param workers: the number of worker processes
+    @param log: optional stream receiving one progress line per level
+    @return: the list of summaries (see summarize), by configuration then in the order of level_files
+    """
+    results = []
+    # one task per process: the peak memory of a process is the one of its only trial (max_tasks_per_child is new in
+    # Python 3.11)
+    pool_options = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=workers, **pool_options) as pool:
+        for config in configs:
+            futures = [[pool.submit(run_trial, level_file, config, budget) for trial in range(trials)]
+                       for level_file in level_files]
+            for level_futures in futures:
+                result = summarize(config, [future.result() for future in level_futures])
+                results.append(result)
+                if log:
+                    print("%s %s/%s: %s in %.3fs (expanded %d, %s nodes/s, peak %.1f MB)" % (
+                        config, result["pack"], result["level"], result["status"], result["time"],
+                        result["expanded"], result["nodes_per_sec"], (result["peak_memory"] or 0) / 2 ** 20),
+                          file=log)
+    return results
+
+
+def compare(results, baseline, threshold=0.2, min_time=0.05, time_threshold=0.5):
+    """
+    Compare a run against a baseline run, level by level
+    @param results: the summaries of the run
+    @param baseline: the summaries of the baseline run
+    @param threshold: the relative increase of expanded nodes reported as a regression (0.2 = 20%)
+    @param min_time: times below this number of seconds in both runs are too noisy to be compared
+    @param time_threshold: the relative increase of the median time reported as a regression, when the time ranges
+    of the trials of both runs don't overlap either
+    @return: a list of (config, pack, level, message) of the regressions, and the same list for the improvements
+    """
+    reference = {(row["config"], row["pack"], row["level"]): row for row in baseline}
+    regressions, improvements = [], []
+    for row in results:
+        key = (row["config"], row["pack"], row["level"])
+        old = reference.get(key)
+        if old is None:
+            continue
+        if old["status"] == "solved" and row["status"] != "solved":
+            regressions.append(key + ("%s, was solved" % row["status"],))
+            continue
+        if row["status"] == "solved" and old["status"] != "solved":
+            improvements.append(key + ("solved, was %s" % old["status"],))
+            continue
+        for field, limit in (("time", time_threshold), ("expanded", threshold)):
+            if field == "time" and max(row["time"], old["time"]) < min_time or not old[field]:
+                continue
+            change = row[field] / old[field] - 1
+            message = "%s %+.1f%% (%s -> %s)" % (field, change * 100, old[field], row[field])
+            # the time of a level changes from run to run: only a change beyond the spread of the trials counts
+            apart = field != "time" or row["time_min"] > old["time_max"] or row["time_max"] < old["time_min"]
+            if change > limit and apart:
+                regressions.append(key + (message,))
+            elif change < -limit and apart:
+                improvements.append(key + (message,))
+    return regressions, improvements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Sokoban search configurations on level packs.")
+    parser.add_argument("packs", nargs="*", default=DEFAULT_PACKS,
+                        help="level directories, level files or collection files (default: the bundled packs)")
+    parser.add_argument("-c", "--config", action="append", choices=sorted(CONFIGS), default=None,
+                        help="configuration to run (repeatable, default: %s)" % ", ".join(DEFAULT_CONFIGS))
+    parser.add_argument("-n", "--trials", type=int, default=3, help="runs of every level (default: 3)")
+    parser.add_argument("--time-limit", type=float, default=60, help="seconds allowed to each search (default: 60)")
+    parser.add_argument("--node-limit", type=int, default=None, help="expanded nodes allowed to each search")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--csv", help="write the results to this CSV file")
+    parser.add_argument("--baseline", help="a JSON file written by an earlier run, to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative increase of expanded nodes reported as a regression (default: 0.2)")
+    parser.add_argument("--time-threshold", type=float, default=0.5,
+                        help="relative increase of the median time reported as a regression (default: 0.5)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="times below this number of seconds are not compared (default: 0.05)")
+    args = parser.parse_args(argv)
+
+    level_files = expand_packs(args.packs)
+    configs = args.config or DEFAULT_CONFIGS
+    budget = Budget(args.time_limit, args.node_limit) if args.time_limit or args.node_limit else None
+    start = time.time()
+    results = run_benchmark(level_files, configs, args.trials, budget, args.workers, log=sys.stderr)
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(start)),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "configs": {config: CONFIGS[config] for config in configs},
+            "trials": args.trials,
+            "time_limit": args.time_limit,
+            "node_limit": args.node_limit,
+            "duration": round(time.time() - start, 3),
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    for config in configs:
+        rows = [row for row in results if row["config"] == config]
+        print("%s: %d/%d solved, %.3fs, %d expanded nodes" % (
+            config, sum(row["status"] == "solved" for row in rows), len(rows), sum(row["time"] for row in rows),
+            sum(row["expanded"] for row in rows)))
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions, improvements = compare(results, baseline, args.threshold, args.min_time, args.time_threshold)
+        for title, changes in (("improvement", improvements), ("REGRESSION", regressions)):
+            for config, pack, level, message in changes:
+                print("%s %s %s/%s: %s" % (title, config, pack, level, message))
+        print("%d regressions, %d improvements over %s" % (len(regressions), len(improvements), args.baseline))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3047 @@
+"""Sokoban solver routines
+    A) Class GameModel, State, PackedState and PushState:
+        Define the structure of a state in state space. This class has some functions helping determine a state
+        in search space. PackedState stores the same state as integers (cell index of the player and a bitmask
+        of the box cells). PushState is the state of the push-level search. GameModel is the board of a game being
+        played (flat array of cells, cell index of the player, set of box cells), shared by the GUI and the tools
+        replaying solutions.
+    B) Class DeadlockSolver:
+        Has some utility function to determine whether a state creates a deadlock situation. "Deadlock" means
+        the level isn't solvable anymore, no matter what the user does.
+    C) Class TranspositionTable, DeadlockDatabase and SolutionCache:
+        TranspositionTable stores the g value and the open/closed flag of every state reached by AStar, keyed by the
+        exact state, with an optional limit on the number of entries. DeadlockDatabase stores on disk the box patterns
+        proven dead in a level, so that later searches of the same level skip them. SolutionCache keeps the results
+        of the searches, in memory and on disk, keyed by the level content, the algorithm and its options.
+    D) Class FIFOFrontier, HeapFrontier and BucketFrontier:
+        Single-threaded queues of states waiting to be expanded, selected by name with the frontier option of Search.
+    E) Class Budget, SearchStats and Search:
+        Budget limits the time, the expanded nodes and the memory of a search, and lets another thread or process
+        cancel it. SearchStats collects the counters and timers of the hot path of a search when they are asked for.
+        Search is an abstract class for types of searching. It also contains some utility function for
+        making decisions on changing a state
+    F) Class BFS and BidirectionalBFS:
+        Contain some functions implementing BFS algorithm, and its bidirectional variant meeting forward pushes from
+        the initial state with backward pulls from the goal configurations
+    G) Class AStar and IDAStar:
+        Contain some functions implementing AStar algorithm, and its iterative deepening variant which only keeps
+        the current path in memory
+    H) Class ParallelAStar and function hda_worker:
+        Hash-distributed A* (HDA*): every state belongs to the worker process selected by its Zobrist hash, and the
+        workers send each other the states they generate in batches.
+    I) Class Portfolio and function portfolio_worker:
+        Race several search configurations in parallel processes and keep the first (or the best) solution.
+    J) Functions load_level, parse_level and class LevelCollection:
+        Read a level file into the input used by the search classes. LevelCollection indexes the levels of a
+        directory or of a large XSB/SOK collection file and reads one level at a time.
+This module has no dependency on tkinter so that it can be used by headless tools (see batch.py).
+"""
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, OrderedDict, defaultdict, deque
+from queue import PriorityQueue, Queue
+import functools
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import random
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ZOBRIST_SEED = 0x50C0BA  # fixed, so that every process computes the same hash for a state
+INF = float("inf")
+
+
+def iter_bits(bits):
+    """
+    Iterate over the indexes of the set bits of an integer, from the lowest to the highest
+    @param bits: a non-negative integer used as a bitmask
+    @return: a generator of bit indexes
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def min_cost_matching(cost):
+    """
+    Solve the assignment problem with the Hungarian algorithm (O(n^2 * m))
+    @param cost: a list of n rows of m costs (n <= m), INF for an impossible pair
+    @return: the minimum total cost of assigning every row to a different column, INF if there is no assignment
+    """
+    n, m = len(cost), len(cost[0]) if cost else 0
+    if n > m:
+        return INF
+    big = 1 + sum(max([c for c in row if c != INF] or [0]) for row in cost)  # stands for INF inside the algorithm
+    u, v = [0] * (n + 1), [0] * (m + 1)
+    match = [0] * (m + 1)  # match[j]: the row assigned to column j (1-based, 0 = none)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = [INF] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = match[j0], INF, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    c = row[j - 1]
+                    cur = (big if c == INF else c) - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    total = 0
+    for j in range(1, m + 1):
+        if match[j]:
+            c = cost[match[j] - 1][j - 1]
+            if c == INF:
+                return INF
+            total += c
+    return total
+
+
+class GameModel:
+    """
+    The board of a game being played: a flat array of cells indexed like the search (cell (x, y) has index
+    x * num_col + y), the cell index of the player and the set of cell indexes of the boxes. A step only updates the
+    player index and at most one box, so replaying a path of n steps costs O(n).
+    It is the reference of the move rules for the GUI and verify.py. The search classes keep their own inlined checks
+    (can_step and can_go_*): they run on their own state representations, mixed with the deadlock pruning, in the
+    innermost loop, where a call into a GameModel per step would cost more than the check itself; tests/test_rules.py
+    checks that both agree.
+    """
+    WALL, GOAL = 1, 2  # flags of the cells array
+
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos):
+        """
+        Create the board of a level, from the same input as the search classes (see load_level)
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param matrix: the matrix of the level, every row padded to num_col characters
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player
+        """
+        self.num_row = num_row
+        self.num_col = num_col
+        self.cells = bytearray(self.WALL if matrix[x][y] == '#' else 0 for x in range(num_row) for y in range(num_col))
+        for x, y in goal_pos:
+            self.cells[x * num_col + y] |= self.GOAL
+        self.boxes = {x * num_col + y for x, y in box_pos}
+        self.player = player_pos[0] * num_col + player_pos[1]
+        self.moves = {"U": -num_col, "D": num_col, "L": -1, "R": 1}
+        self.steps, self.pushes = 0, 0  # made since the creation of the board
+
+    @classmethod
+    def load(cls, level):
+        """
+        @param level: path of the level file
+        @return: the board of the level at its initial state
+        """
+        matrix, num_row, num_col, box_pos, goal_pos, player_pos = load_level(level)
+        return cls(num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+
+    def copy(self):
+        """
+        @return: a new board in the same state; the cells array is shared since it never changes
+        """
+        board = GameModel.__new__(GameModel)
+        board.__dict__.update(self.__dict__)
+        board.boxes = set(self.boxes)
+        return board
+
+    def level(self):
+        """
+        @return: the input of the search classes for the current state of the board: num_row, num_col, matrix,
+        box_pos, goal_pos and player_pos
+        """
+        matrix = [['#' if self.cells[x * self.num_col + y] & self.WALL else
+                   ('.' if self.cells[x * self.num_col + y] & self.GOAL else ' ') for y in range(self.num_col)]
+                  for x in range(self.num_row)]
+        goal_pos = {divmod(i, self.num_col) for i, cell in enumerate(self.cells) if cell & self.GOAL}
+        return (self.num_row, self.num_col, matrix, {divmod(box, self.num_col) for box in self.boxes}, goal_pos,
+                divmod(self.player, self.num_col))
+
+    def can_move(self, direction):
+        """
+        @param direction: U, D, L or R
+        @return: "push" if the step pushes a box, "step" if it doesn't, None if the step is not possible
+        """
+        d = self.moves[direction]
+        t1 = self.player + d
+        if not 0 <= t1 < len(self.cells) or self.cells[t1] & self.WALL:
+            return None
+        if t1 in self.boxes:
+            t2 = t1 + d
+            if not 0 <= t2 < len(self.cells) or self.cells[t2] & self.WALL or t2 in self.boxes:
+                return None
+            return "push"
+        return "step"
+
+    def move(self, direction):
+        """
+        Move the player one step, pushing the box in front of the player if there is one
+        @param direction: U, D, L or R
+        @return: "push", "step" or None as can_move; the board is unchanged when the step is not possible
+        """
+        kind = self.can_move(direction)
+        if kind is not None:
+            d = self.moves[direction]
+            self.player += d
+            if kind == "push":
+                self.boxes.remove(self.player)
+                self.boxes.add(self.player + d)
+                self.pushes += 1
+            self.steps += 1
+        return kind
+
+    def replay(self, path):
+        """
+        Make every step of a path
+        @param path: an iterable of U, D, L and R (upper or lower case)
+        @return: the number of pushes of the path
+        @raise ValueError: at the first step which is not a direction or not possible; the steps before it are made
+        """
+        # same rules as move, inlined with local variables: this loop replays millions of steps per second
+        steps = {}
+        for direction, d in self.moves.items():
+            steps[direction] = steps[direction.lower()] = d
+        cells, boxes, wall, size = self.cells, self.boxes, self.WALL, len(self.cells)
+        player, made, pushes = self.player, 0, 0
+        try:
+            for direction in path:
+                d = steps.get(direction)
+                if d is None:
+                    raise ValueError("unknown step %r at move %d" % (direction, made + 1))
+                t1 = player + d
+                if not 0 <= t1 < size or cells[t1] & wall:
+                    raise ValueError("illegal step %r at move %d" % (direction, made + 1))
+                if t1 in boxes:
+                    t2 = t1 + d
+                    if not 0 <= t2 < size or cells[t2] & wall or t2 in boxes:
+                        raise ValueError("illegal push %r at move %d" % (direction, made + 1))
+                    boxes.remove(t1)
+                    boxes.add(t2)
+                    pushes += 1
+                player = t1
+                made += 1
+        finally:
+            self.player = player
+            self.steps += made
+            self.pushes += pushes
+        return pushes
+
+    def is_solved(self):
+        """
+        @return: True if every box is on a goal
+        """
+        return all(self.cells[box] & self.GOAL for box in self.boxes)
+
+    def char(self, i):
+        """
+        @param i: a cell index
+        @return: the character of the cell in a level file (#, ' ', ., $, *, @ or +)
+        """
+        cell = self.cells[i]
+        if cell & self.WALL:
+            return '#'
+        if i in self.boxes:
+            return '*' if cell & self.GOAL else '$'
+        if i == self.player:
+            return '+' if cell & self.GOAL else '@'
+        return '.' if cell & self.GOAL else ' '
+
+    def rows(self):
+        """
+        @return: the board as a list of rows of characters, like a level file without trailing spaces
+        """
+        return [list("".join(self.char(x * self.num_col + y) for y in range(self.num_col)).rstrip())
+                for x in range(self.num_row)]
+
+
+class State:
+    # States are created by the hundred thousands, so they don't carry a __dict__
+    __slots__ = ("box_pos", "player_pos", "ancestor", "gval", "fval", "zobrist")
+
+    def __init__(self, box_pos, player_pos, ancestor, gval=-1, fval=-1, zobrist=None):
+        """
+        Create a new state of sokoban game
+        @param box_pos: A set of tuples which displays the positions of boxes in a state
+        @param player_pos: A tuple which displays the position of player in a state
+        @param ancestor: An object with State type which displays the state of ancestor (node) of current state (node)
+        @param gval: an integer number that is the cost of getting to current state. It's used when we implement A* algorithm
+        @param fval: a number (integer or real) that is the cost of getting from state to last state through current state.
+        It's used when we implement A* algorithm
+        @param zobrist: the cached Zobrist hash of the state (see Search.zobrist_hash), None to hash the containers
+        """
+        self.box_pos = box_pos
+        self.player_pos = player_pos
+        self.ancestor = ancestor
+        self.gval = gval
+        self.fval = fval
+        self.zobrist = zobrist
+
+    def __eq__(self, state):
+        """
+        Used to compare the instances of the class with == operator
+        @param: another state (object) that we want to compare with current state (object)
+        @return: a boolean value shows whether states are equal
+        """
+        return self.player_pos == state.player_pos and self.box_pos == state.box_pos
+
+    def __hash__(self):
+        """
+        The hash method must be implemented for actions to be inserted into sets
+        and dictionaries (make a hashable object). It's also used for implementing index for lookup table of references to nodes.
+        @return: The hash value of the action.
+        """
+        if self.zobrist is not None:
+            return self.zobrist
+        return hash(
+            (self.player_pos, frozenset(self.box_pos)))  # use frozenset (immutable set) for creating hashable value
+
+    def __lt__(self, state):
+        """
+        For A* algorithm first we muse a priority queue data structure. This queue stores search nodes
+        waiting to be expanded. Thus we need to define a node1 < node2 function by defining
+        the __lt__ function. Dependent on the type of search this comparison function compares the h-value,
+        the g-value or the f-value of the nodes. Note for the f-value we wish to break ties by letting
+        node1 < node2 if they both have identical f-values but if node1 has a GREATER g value.
+        This means that we expand nodes along deeper paths first causing the search to proceed directly to the goal
+        """
+        if self.fval == state.fval:
+            return self.gval > state.gval
+        return self.fval < state.fval
+
+    def is_final_state(self, goal_pos):
+        """
+        Check if current state a goal state. The goal state has all boxes in all goal positions
+        @param goal_pos: positions of the goals
+        @return: a boolean value shows whether current state is goal state
+        """
+        return self.box_pos == goal_pos
+
+    def deep_copy_box_pos(self):
+        """
+        Deep copy of positon of boxes
+        @return: a copy value of the positions of boxes
+        """
+        return self.box_pos.copy()
+
+    def key(self):
+        """
+        @return: an immutable value identifying the state exactly (used by TranspositionTable)
+        """
+        return self.player_pos, frozenset(self.box_pos)
+
+
+class PackedState(State):
+    __slots__ = ()
+
+    def __init__(self, box_pos, player_pos, ancestor, gval=-1, fval=-1, zobrist=None):
+        """
+        Create a new state of sokoban game in packed form. Cells are indexed as x * num_col + y.
+        @param box_pos: an integer whose bit i is set if there is a box at cell i
+        @param player_pos: the cell index of the player
+        @param ancestor: An object with State type which displays the state of ancestor (node) of current state (node)
+        @param gval: an integer number that is the cost of getting to current state
+        @param fval: a number (integer or real) that is the cost of getting from state to last state through current state
+        @param zobrist: the cached Zobrist hash of the state, None to hash the integers
+        """
+        super().__init__(box_pos, player_pos, ancestor, gval, fval, zobrist)
+
+    def __hash__(self):
+        """
+        Hash of two machine integers, no container is built
+        @return: The hash value of the state.
+        """
+        if self.zobrist is not None:
+            return self.zobrist
+        return hash((self.player_pos, self.box_pos))
+
+    def key(self):
+        """
+        @return: an immutable value identifying the state exactly (used by TranspositionTable)
+        """
+        return self.player_pos, self.box_pos
+
+    def deep_copy_box_pos(self):
+        """
+        Integers are immutable, so the bitmask can be shared with the new state
+        @return: the bitmask of box positions
+        """
+        return self.box_pos
+
+
+class PushState(PackedState):
+    __slots__ = ("pushes",)
+
+    def __init__(self, box_pos, player_pos, ancestor, pushes=(), gval=-1, fval=-1, zobrist=None):
+        """
+        Create a new state of the push-level search. Two states are equal when they have the same boxes and the
+        player can walk from one player position to the other, so player_pos is normalized to the smallest cell
+        index of the area reachable by the player.
+        @param box_pos: an integer whose bit i is set if there is a box at cell i
+        @param player_pos: the smallest cell index reachable by the player
+        @param ancestor: the state before the pushes
+        @param pushes: a tuple of (box cell, d) pairs, the pushes made from ancestor to reach this state, where d is
+        the difference of cell index of the push
+        @param gval: an integer number that is the cost (number of pushes) of getting to current state
+        @param fval: a number (integer or real) that is the cost of getting from state to last state through current state
+        @param zobrist: the cached Zobrist hash of the state
+        """
+        super().__init__(box_pos, player_pos, ancestor, gval, fval, zobrist)
+        self.pushes = pushes
+
+
+class DeadlockSolver:
+    @staticmethod
+    def has_simple_deadlock(matrix, num_row, num_col, goal_pos):
+        """
+        Static method to pre-mark if a position in matrix has a simple deadlock. Simple deadlocks squares
+        of a level never change during the gameplay.
+        @param matrix: a map of the gameplay
+        @param num_row: the number of row of matrix
+        @param num_col: the number of column of matrix
+        @param goal_pos: a set of tuple displays positions of the goals
+        @return: a pre-marked matrix with boolean values showing that positions has simple deadlock or not
+        """
+        matrix_flag = [[True] * num_col for i in range(num_row)]  # pre-mark all position of matrix as deadlock
+        # for loop with BFS style (use queue data structure) to pull the boxes from all goal positions
+        # to all posible positions of matrix.
+        for goal in goal_pos:
+            q = Queue()  # FIFO queue for storing the positions
+            q.put(goal)
+            matrix_flag[goal[0]][goal[1]] = False  # This position is not a deadlock
+            while not q.empty():
+                (x, y) = q.get()
+                # We can pull a box up if position (x - 1, y) and (x - 2, y) are not the walls
+                if matrix[x - 1][y] != '#' and matrix[x - 2][y] != '#':
+                    if matrix_flag[x - 1][y]:
+                        q.put((x - 1, y))
+                        matrix_flag[x - 1][y] = False  # This position is not a deadlock
+                # We can pull a box down if position (x + 1, y) and (x + 2, y) are not the walls
+                if matrix[x + 1][y] != '#' and matrix[x + 2][y] != '#':
+                    if matrix_flag[x + 1][y]:
+                        q.put((x + 1, y))
+                        matrix_flag[x + 1][y] = False  # This position is not a deadlock
+                # We can pull a box left if position (x, y - 1) and (x, y - 2) are not the walls
+                if matrix[x][y - 1] != '#' and matrix[x][y - 2] != '#':
+                    if matrix_flag[x][y - 1]:
+                        q.put((x, y - 1))
+                        matrix_flag[x][y - 1] = False  # This position is not a deadlock
+                # We can pull a box right if position (x, y + 1) and (x, y + 2) are not the walls
+                if matrix[x][y + 1] != '#' and matrix[x][y + 2] != '#':
+                    if matrix_flag[x][y + 1]:
+                        q.put((x, y + 1))
+                        matrix_flag[x][y + 1] = False  # This position is not a deadlock
+        return matrix_flag
+
+    @staticmethod
+    def pull_distances(matrix, num_row, num_col, goal):
+        """
+        Static method to compute the number of pushes needed to bring a box from every cell to a goal, other boxes
+        ignored. Like has_simple_deadlock, it pulls the box from the goal in BFS style, but keeps the distances.
+        @param matrix: a map of the gameplay
+        @param num_row: the number of row of matrix
+        @param num_col: the number of column of matrix
+        @param goal: a tuple of the goal position
+        @return: a list indexed by cell index (x * num_col + y) of distances, INF if the box can't reach the goal
+        """
+        distance = [INF] * (num_row * num_col)
+        distance[goal[0] * num_col + goal[1]] = 0
+        q = deque([goal])
+        while q:
+            (x, y) = q.popleft()
+            d = distance[x * num_col + y] + 1
+            # the box can be pulled from (x, y) to (x + dx, y + dy) if both (x + dx, y + dy) and (x + 2dx, y + 2dy)
+            # are not walls
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                if matrix[x + dx][y + dy] != '#' and matrix[x + 2 * dx][y + 2 * dy] != '#':
+                    i = (x + dx) * num_col + y + dy
+                    if distance[i] == INF:
+                        distance[i] = d
+                        q.append((x + dx, y + dy))
+        return distance
+
+    @staticmethod
+    def goal_distance_table(matrix, num_row, num_col, goal_pos):
+        """
+        Static method to get the pull_distances of every goal of a level. The tables are computed once per level
+        and shared by every Search of the same level in the process, so they must not be modified.
+        @param matrix: a map of the gameplay
+        @param num_row: the number of row of matrix
+        @param num_col: the number of column of matrix
+        @param goal_pos: a set of tuple displays positions of the goals
+        @return: a tuple of (goal, distances) pairs sorted by goal, distances as returned by pull_distances
+        """
+        walls = "\n".join("".join('#' if char == '#' else ' ' for char in row) for row in matrix)
+        return DeadlockSolver._goal_distance_table(walls, num_row, num_col, tuple(sorted(goal_pos)))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _goal_distance_table(walls, num_row, num_col, goals):
+        matrix = walls.split("\n")
+        return tuple((goal, DeadlockSolver.pull_distances(matrix, num_row, num_col, goal)) for goal in goals)
+
+    @staticmethod
+    def has_freeze_deadlock(pos, matrix, box_pos, goal_pos, has_simple_deadlock, checked_list):
+        """
+        Static method a move of a box to a new position has a freeze deadlock
+        @param pos: a tuple of new position of the box after being moved
+        @param box_pos: A set of tuples which displays the positions of boxes after moving the box
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param has_simple_deadlock: the pre-marked of simple deadlocks of matrix
+        @param checked_list: a set of tuple storing all freezed deadlock nodes has been checked so far
+        @return: a boolean value show that if a move of the box to new position has deadlock or not
+        """
+        (x, y) = pos  # assign new position
+        checked_list.add((x, y))  # mark new position as being checked
+        # The box is blocked along the vertical axis when one of the following checks are true:
+        #     If there is a wall on the left or on the right side of the box then the box is blocked along this axis
+        #     If there is a simple deadlock square on both sides (left and right) of the box the box is blocked along this axis
+        #     If there is a box one the left or right side then this box is blocked if the other box is blocked.
+        x_axis_freeze = False
+        if matrix[x + 1][y] == '#' or matrix[x - 1][y] == '#':
+            x_axis_freeze = True
+        elif has_simple_deadlock[x + 1][y] and has_simple_deadlock[x - 1][y]:
+            x_axis_freeze = True
+        elif (x + 1, y) in box_pos and (
+                (x + 1, y) in checked_list or DeadlockSolver.has_freeze_deadlock((x + 1, y), matrix, box_pos, goal_pos,
+                                                                                 has_simple_deadlock, checked_list)):
+            x_axis_freeze = True
+        elif (x - 1, y) in box_pos and (
+                (x - 1, y) in checked_list or DeadlockSolver.has_freeze_deadlock((x - 1, y), matrix, box_pos, goal_pos,
+                                                                                 has_simple_deadlock, checked_list)):
+            x_axis_freeze = True
+        else:
+            return False
+        # The box is blocked along the horizontal axis when one of the following checks are true:
+        #     If there is a wall on the above side or under side of the box then the box is blocked along this axis
+        #     If there is a simple deadlock square on both sides (above and under) of the box the box is blocked along this axis
+        #     If there is a box one the above or under side then this box is blocked if the other box is blocked.
+        y_axis_freeze = False
+        if matrix[x][y + 1] == '#' or matrix[x][y - 1] == '#':
+            y_axis_freeze = True
+        elif has_simple_deadlock[x][y + 1] and has_simple_deadlock[x][y - 1]:
+            y_axis_freeze = True
+        elif (x, y + 1) in box_pos and (
+                (x, y + 1) in checked_list or DeadlockSolver.has_freeze_deadlock((x, y + 1), matrix, box_pos, goal_pos,
+                                                                                 has_simple_deadlock, checked_list)):
+            y_axis_freeze = True
+        elif (x, y - 1) in box_pos and (
+                (x, y - 1) in checked_list or DeadlockSolver.has_freeze_deadlock((x, y - 1), matrix, box_pos, goal_pos,
+                                                                                 has_simple_deadlock, checked_list)):
+            y_axis_freeze = True
+        else:
+            return False
+        # If the new box position doesn't make a goal state, we accept this situation as freeze deadlock
+        all_box_not_in_goal = False
+        for box in checked_list:
+            if box not in goal_pos:
+                all_box_not_in_goal = True
+        return x_axis_freeze and y_axis_freeze and all_box_not_in_goal
+
+    @staticmethod
+    def has_packed_freeze_deadlock(pos, num_col, wall, simple_deadlock, box_bits, goal_bits, checked_list):
+        """
+        Same check as has_freeze_deadlock for the packed representation
+        @param pos: the cell index of the box after being moved
+        @param num_col: the number of columns of matrix (the distance between two vertically adjacent cells)
+        @param wall: a bytearray, wall[i] is 1 if cell i is a wall
+        @param simple_deadlock: a bytearray, simple_deadlock[i] is 1 if cell i is a simple deadlock square
+        @param box_bits: the bitmask of box positions after moving the box
+        @param goal_bits: the bitmask of goal positions
+        @param checked_list: a set of cell indexes of all freezed deadlock nodes has been checked so far
+        @return: a boolean value show that if a move of the box to new position has deadlock or not
+        """
+        checked_list.add(pos)
+        # blocked along the vertical axis
+        up, down = pos - num_col, pos + num_col
+        if wall[down] or wall[up]:
+            pass
+        elif simple_deadlock[down] and simple_deadlock[up]:
+            pass
+        elif box_bits >> down & 1 and (
+                down in checked_list or DeadlockSolver.has_packed_freeze_deadlock(down, num_col, wall, simple_deadlock,
+                                                                                  box_bits, goal_bits, checked_list)):
+            pass
+        elif box_bits >> up & 1 and (
+                up in checked_list or DeadlockSolver.has_packed_freeze_deadlock(up, num_col, wall, simple_deadlock,
+                                                                                box_bits, goal_bits, checked_list)):
+            pass
+        else:
+            return False
+        # blocked along the horizontal axis
+        left, right = pos - 1, pos + 1
+        if wall[right] or wall[left]:
+            pass
+        elif simple_deadlock[right] and simple_deadlock[left]:
+            pass
+        elif box_bits >> right & 1 and (
+                right in checked_list or DeadlockSolver.has_packed_freeze_deadlock(right, num_col, wall, simple_deadlock,
+                                                                                   box_bits, goal_bits, checked_list)):
+            pass
+        elif box_bits >> left & 1 and (
+                left in checked_list or DeadlockSolver.has_packed_freeze_deadlock(left, num_col, wall, simple_deadlock,
+                                                                                  box_bits, goal_bits, checked_list)):
+            pass
+        else:
+            return False
+        # it is a freeze deadlock only if one of the frozen boxes is not in a goal
+        return any(not goal_bits >> box & 1 for box in checked_list)
+
+
+class TranspositionTable:
+    OPEN, CLOSED = 1, 2
+
+    def __init__(self, max_entries=None):
+        """
+        Create a new table. An entry only holds the g value and the open/closed flag of a state, in flat arrays
+        indexed by a slot number; the parent of a state is the ancestor of the State object in the frontier.
+        @param max_entries: the maximum number of entries, None for no limit. When the table is full the entry that
+        was closed the longest time ago is replaced; if that state is reached again it is simply searched again.
+        The limit only bounds the table, not the memory of the search: the states of the frontier still hold their
+        ancestors (evicted or not) for the path, and the copies of a state queued before it was closed stay in the
+        frontier until they are dequeued and skipped. As evicted states and everything below them are searched again,
+        a table much smaller than the number of states explored makes the search many times slower, and its frontier
+        larger.
+        """
+        self.max_entries = max_entries
+        self.slots = dict()  # exact state key -> slot
+        self.keys = []  # slot -> exact state key
+        self.gval = array('l')
+        self.flag = bytearray()
+        self.free_slots = []
+        self.closed_slots = deque()  # closed slots, oldest first: the replacement candidates
+        self.inserted = 0  # number of insertions, i.e. the number of explored nodes
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def lookup(self, key):
+        """
+        @param key: the exact key of a state
+        @return: the slot of the state, or None if the state is not in the table
+        """
+        return self.slots.get(key)
+
+    def insert(self, key, gval):
+        """
+        Add an open state to the table
+        @param key: the exact key of a state
+        @param gval: the g value of the state
+        @return: the slot of the state
+        """
+        if self.max_entries is not None and len(self.slots) >= self.max_entries:
+            self.evict()
+        self.inserted += 1
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.keys[slot] = key
+            self.gval[slot] = gval
+            self.flag[slot] = self.OPEN
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.gval.append(gval)
+            self.flag.append(self.OPEN)
+        self.slots[key] = slot
+        return slot
+
+    def reopen(self, slot, gval):
+        """
+        Record a cheaper path to a state
+        @param slot: the slot of the state
+        @param gval: the new g value of the state
+        """
+        self.gval[slot] = gval
+        self.flag[slot] = self.OPEN
+
+    def close(self, slot):
+        """
+        Mark a state as expanded
+        @param slot: the slot of the state
+        """
+        self.flag[slot] = self.CLOSED
+        if self.max_entries is not None:
+            self.closed_slots.append(slot)
+
+    def evict(self):
+        """
+        Free the slot of the oldest closed state. Open states are never evicted, so the table may exceed
+        max_entries when every entry is open.
+        """
+        while self.closed_slots:
+            slot = self.closed_slots.popleft()
+            if self.flag[slot] == self.CLOSED:  # it could have been reopened since it was closed
+                del self.slots[self.keys[slot]]
+                self.keys[slot] = None
+                self.flag[slot] = 0
+                self.free_slots.append(slot)
+                self.evicted += 1
+                return
+
+
+class DeadlockDatabase:
+    def __init__(self, directory, fingerprint):
+        """
+        Open the deadlock patterns of a level. A pattern is a pair (boxes, player): the bitmask of a few boxes which
+        can't be solved when the player is in the area of smallest cell index player (area computed with only these
+        boxes in the level). Any state containing these boxes, with the player in the same area, is dead too.
+        The patterns are appended to the file <directory>/<fingerprint>.txt, one "boxes player" line each.
+        @param directory: the directory of the database, created if needed
+        @param fingerprint: the fingerprint of the level (see Search.fingerprint)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.file_name = os.path.join(directory, fingerprint + ".txt")
+        self.patterns = []
+        self.known = set()
+        self.by_cell = dict()  # cell index -> the patterns having a box on the cell
+        if os.path.exists(self.file_name):
+            with open(self.file_name, 'r') as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) == 2:
+                        self.remember((int(fields[0]), int(fields[1])))
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def remember(self, pattern):
+        if pattern not in self.known:
+            self.known.add(pattern)
+            self.patterns.append(pattern)
+            for cell in iter_bits(pattern[0]):
+                self.by_cell.setdefault(cell, []).append(pattern)
+            return True
+        return False
+
+    def add(self, boxes, player):
+        """
+        Record a new pattern in memory and on disk
+        @param boxes: the bitmask of the boxes of the pattern
+        @param player: the smallest cell index of the player area
+        @return: True if the pattern is new
+        """
+        if self.remember((boxes, player)):
+            with open(self.file_name, 'a') as f:
+                f.write("%d %d\n" % (boxes, player))
+            return True
+        return False
+
+    def candidates(self, box_pos, cell=None):
+        """
+        @param box_pos: the bitmask of box positions of a state
+        @param cell: the cell a box was just pushed to, None to look at every pattern. A pattern without a box on it
+        was already in the state before the push, which was checked then, so only the patterns of the cell are
+        looked at.
+        @return: the patterns whose boxes are all in box_pos
+        """
+        patterns = self.patterns if cell is None else self.by_cell.get(cell, ())
+        return [pattern for pattern in patterns if box_pos & pattern[0] == pattern[0]]
+
+
+class SolutionCache:
+    def __init__(self, directory=None, max_entries=128):
+        """
+        Create a cache of search results. The most recently used results are kept in memory, and every result is
+        also written to <directory>/<key>.json so that it survives the program.
+        @param directory: the directory of the on-disk store, created if needed (None to only keep them in memory)
+        @param max_entries: the maximum number of results kept in memory
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> result, the least recently used first
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(level_content, algorithm, options=None):
+        """
+        @param level_content: the content of the level file (str or bytes)
+        @param algorithm: the name of the algorithm (a key of ALGORITHMS)
+        @param options: the dictionary of options of the search changing its result
+        @return: the hex digest identifying a search
+        """
+        if isinstance(level_content, str):
+            level_content = level_content.encode()
+        level_hash = hashlib.sha1(level_content).hexdigest()
+        return hashlib.sha1(json.dumps([level_hash, algorithm, options or {}], sort_keys=True,
+                                       default=str).encode()).hexdigest()
+
+    def file_name(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """
+        @param key: a key made by SolutionCache.key
+        @return: the result stored with key (a dictionary with path, expanded and explored), None if there is none
+        """
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            return result
+        if self.directory:
+            try:
+                with open(self.file_name(key), 'r') as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self.remember(key, result)
+        return result
+
+    def remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def put(self, key, path, expanded_num, explored_num):
+        """
+        Store the result of a search
+        @param key: a key made by SolutionCache.key
+        @param path: the list of steps returned by the search
+        @param expanded_num: the number of expanded nodes
+        @param explored_num: the number of explored nodes
+        """
+        result = {"path": list(path), "expanded": expanded_num, "explored": explored_num}
+        self.remember(key, result)
+        if self.directory:
+            # write a temporary file first so that a reader never sees half a result
+            temp_name = "%s.%d.tmp" % (self.file_name(key), os.getpid())
+            with open(temp_name, 'w') as f:
+                json.dump(result, f)
+            os.replace(temp_name, self.file_name(key))
+
+
+class FIFOFrontier:
+    def __init__(self):
+        """
+        First in, first out frontier on a deque (no locking, unlike queue.Queue)
+        """
+        self.items = deque()
+
+    def __len__(self):
+        return len(self.items)
+
+    def empty(self):
+        return not self.items
+
+    def put(self, state):
+        self.items.append(state)
+
+    def get(self):
+        return self.items.popleft()
+
+
+class HeapFrontier:
+    def __init__(self):
+        """
+        Priority frontier on a heapq list. States are ordered by lowest f value, then by greatest g value, then by
+        insertion order, and the entries are tuples so State.__lt__ is never called. Outdated copies of a state are
+        not removed: the search skips them when they are dequeued (lazy deletion).
+        """
+        self.items = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.items)
+
+    def empty(self):
+        return not self.items
+
+    def put(self, state):
+        heapq.heappush(self.items, (state.fval, -state.gval, next(self.counter), state))
+
+    def get(self):
+        return heapq.heappop(self.items)[3]
+
+
+class BucketFrontier:
+    def __init__(self):
+        """
+        Priority frontier for integer f values: one list (bucket) per f value, and a cursor on the lowest non-empty
+        bucket. Inside a bucket the last state added is the first out, which prefers the deeper states like the
+        tie-break of State.__lt__. put and get are O(1) amortized; f values must be non-negative integers, and the
+        buckets of every f value up to the largest one are allocated (many, for weighted A* with a large weight).
+        """
+        self.buckets = []
+        self.lowest = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def empty(self):
+        return self.size == 0
+
+    def put(self, state):
+        f = state.fval
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+        self.buckets[f].append(state)
+        if f < self.lowest:
+            self.lowest = f
+        self.size += 1
+
+    def get(self):
+        while not self.buckets[self.lowest]:
+            self.lowest += 1
+        self.size -= 1
+        return self.buckets[self.lowest].pop()
+
+
+class QueueFrontier(Queue):
+    """
+    queue.Queue with the len of the other frontiers
+    """
+    def __len__(self):
+        return self.qsize()
+
+
+class PriorityQueueFrontier(PriorityQueue):
+    """
+    queue.PriorityQueue with the len of the other frontiers
+    """
+    def __len__(self):
+        return self.qsize()
+
+
+# Frontier classes selectable by name with the frontier option of Search. "queue" and "priority_queue" are the
+# thread-safe classes of the standard library, kept for comparison.
+FRONTIERS = {"deque": FIFOFrontier, "heap": HeapFrontier, "bucket": BucketFrontier,
+             "queue": QueueFrontier, "priority_queue": PriorityQueueFrontier}
+
+
+class Budget:
+    def __init__(self, time_limit=None, node_limit=None, memory_limit=None, cancel=None, check_every=256):
+        """
+        Create the limits of a search. A search over budget stops and returns ["Budget exceeded"] with the numbers
+        of expanded and explored nodes reached so far, and the reason is kept in the reason attribute.
+        @param time_limit: the maximum number of seconds of the search
+        @param node_limit: the maximum number of expanded nodes
+        @param memory_limit: the maximum memory of the process in bytes: the peak traced by tracemalloc when it is
+        tracing, else the resident set size
+        @param cancel: an object whose is_set() returns True when the search must stop (threading.Event,
+        multiprocessing.Event...)
+        @param check_every: the time, the memory and the cancellation are checked once every check_every nodes
+        """
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.memory_limit = memory_limit
+        self.cancel = cancel
+        self.check_every = check_every
+        self.deadline = None
+        self.reason = None  # "time", "nodes", "memory" or "cancelled" once the budget is exceeded
+
+    def start(self):
+        self.deadline = None if self.time_limit is None else time.monotonic() + self.time_limit
+        self.reason = None
+
+    @staticmethod
+    def memory_usage():
+        """
+        @return: the memory used by the process in bytes (see memory_limit), None if it can't be measured
+        """
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            pass
+        if resource is not None:  # the peak instead of the current size, in kilobytes on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return None
+
+    def exceeded(self, expanded_num, always=False):
+        """
+        Check the budget, called once per expanded node
+        @param expanded_num: the number of nodes expanded so far
+        @param always: check the cancellation, the time and the memory at this call, not only when expanded_num is a
+        multiple of check_every (for callers whose count of nodes jumps, like the parent process of ParallelAStar)
+        @return: True if the search must stop
+        """
+        if self.node_limit is not None and expanded_num >= self.node_limit:
+            self.reason = "nodes"
+        elif expanded_num % self.check_every and not always:
+            return False
+        elif self.cancel is not None and self.cancel.is_set():
+            self.reason = "cancelled"
+        elif self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = "time"
+        elif self.memory_limit is not None and (Budget.memory_usage() or 0) > self.memory_limit:
+            self.reason = "memory"
+        return self.reason is not None
+
+
+class SearchStats:
+    def __init__(self):
+        """
+        Counters and timers of a search, collected when the stats option of Search is on. counters holds the number
+        of calls of every timed method and the number of events (prune_simple, prune_freeze, prune_learned,
+        prune_corral and prune_heuristic for the states pruned by each kind of deadlock, learned for the new patterns
+        of the deadlock database, duplicates, reopenings and stale frontier entries). timers holds the seconds spent in every timed method, nested calls included (the
+        time of expand contains the time of heuristic).
+        """
+        self.counters = Counter()
+        self.timers = defaultdict(float)
+        self.max_frontier = 0  # the largest size of the frontier (the stack of IDAStar, a layer of BidirectionalBFS)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def frontier_size(self, size):
+        if size > self.max_frontier:
+            self.max_frontier = size
+
+    def timed(self, name, function):
+        """
+        @param name: the name of the timer and of the call counter
+        @param function: a function (or a bound method)
+        @return: a function doing the same, and adding its calls and its time to the timer name
+        """
+        counters, timers, clock = self.counters, self.timers, time.perf_counter
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timers[name] += clock() - start
+                counters[name] += 1
+        return timed_function
+
+    def watch_frontier(self, frontier):
+        """
+        Time the put and get of a frontier and record its largest size
+        @param frontier: a new frontier object (see FRONTIERS)
+        @return: the same frontier
+        """
+        size = frontier.__len__
+        put = self.timed("frontier_put", frontier.put)
+
+        def watched_put(*args, **kwargs):
+            put(*args, **kwargs)
+            self.frontier_size(size())
+        frontier.put = watched_put
+        frontier.get = self.timed("frontier_get", frontier.get)
+        return frontier
+
+    def as_dict(self):
+        """
+        @return: the counters, the timers (in seconds) and the largest frontier size, in a JSON serializable dictionary
+        """
+        return {"counters": dict(sorted(self.counters.items())),
+                "timers": {name: round(seconds, 6) for name, seconds in sorted(self.timers.items())},
+                "max_frontier": self.max_frontier}
+
+    def report(self):
+        """
+        @return: a text table of the timers (slowest first), then of the other counters
+        """
+        lines = ["%-28s %10s %10s" % ("phase", "calls", "seconds")]
+        for name, seconds in sorted(self.timers.items(), key=lambda item: -item[1]):
+            lines.append("%-28s %10d %10.3f" % (name, self.counters[name], seconds))
+        for name, n in sorted(self.counters.items()):
+            if name not in self.timers:
+                lines.append("%-28s %10d" % (name, n))
+        lines.append("%-28s %10d" % ("max_frontier", self.max_frontier))
+        return "\n".join(lines)
+
+
+class Search(ABC):
+    default_frontier = None  # name of the frontier class used when the frontier option is not given
+    progress_every = 1000  # number of expanded nodes between two calls of the progress callback
+    learned_size = 4  # the largest freeze deadlock recorded in the deadlock database, in boxes
+
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, packed=False, mode="step",
+                 frontier=None, corral=False, corral_limit=500, deadlock_db=None, macros=False, budget=None,
+                 progress=None, stats=False):
+        """
+        Creat a new Search object
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param packed: use PackedState (integer cell index and box bitmask) instead of State
+        @param mode: "step" expands one node per player step, "push" expands one node per box push (PushState).
+        The push mode always uses the packed representation.
+        @param frontier: the name of the frontier class (a key of FRONTIERS), None for the default of the algorithm
+        @param corral: prune corral deadlocks and restrict the pushes to PI-corrals (push mode only)
+        @param corral_limit: the maximum number of states of the small search proving a corral deadlock
+        @param deadlock_db: a directory where the deadlock patterns learned during the searches are kept (the freeze
+        deadlocks of at most learned_size boxes met by any search, and the corrals proven by the corral searches);
+        the patterns already known for the level are checked before every push
+        @param macros: push a box through a tunnel and into a goal room as a single move (push mode only)
+        @param budget: a Budget limiting the search, None for no limit
+        @param progress: a function called every progress_every expanded nodes with the numbers of expanded and
+        explored nodes and the size of the frontier; it runs in the thread of the search
+        @param stats: collect the counters and timers of the search in the stats attribute (a SearchStats, None when
+        this option is off). The methods of the hot path are only wrapped when it is on, so it costs nothing otherwise.
+        """
+        if mode not in ("step", "push"):
+            raise ValueError("unknown search mode: %r" % (mode,))
+        if corral and mode != "push":
+            raise ValueError("corral pruning needs the push mode")
+        if macros and mode != "push":
+            raise ValueError("macro moves need the push mode")
+        self.macros = macros
+        self.budget = budget
+        self.progress = progress
+        self.stats = SearchStats() if stats else None
+        # the deadlock tests of the hot path go through the object, so that instrument can time them
+        self.has_freeze_deadlock = DeadlockSolver.has_freeze_deadlock
+        self.has_packed_freeze_deadlock = DeadlockSolver.has_packed_freeze_deadlock
+        self.corral = corral
+        self.corral_limit = corral_limit
+        self.corral_prunes = 0  # number of states proven dead by a corral search
+        self.frontier = frontier or self.default_frontier
+        if self.frontier not in FRONTIERS:
+            raise ValueError("unknown frontier: %r" % (self.frontier,))
+        self.num_row = num_row
+        self.num_col = num_col
+        self.matrix = matrix
+        self.goal_pos = goal_pos
+        self.mode = mode
+        self.packed = packed or mode == "push"
+        # goal x cell table of push distances: goal_distances[k][i] is the number of pushes needed to bring a box from
+        # cell i to goal k, INF if it can't get there
+        table = DeadlockSolver.goal_distance_table(self.matrix, self.num_row, self.num_col, self.goal_pos)
+        self.goal_distances = [distances for goal, distances in table]
+        # box_distance[i]: distance from cell i to the nearest goal
+        self.box_distance = [min(column) for column in zip(*self.goal_distances)] if table \
+            else [INF] * (num_row * num_col)
+        # add new attribute has_simple_deadlock to track simple deadlock postition: the cells from where no goal
+        # can be reached (same squares as DeadlockSolver.has_simple_deadlock)
+        self.has_simple_deadlock = [[self.box_distance[x * num_col + y] == INF for y in range(num_col)]
+                                    for x in range(num_row)]
+        # Zobrist keys: one random number per cell for a box and for the player on that cell. The hash of a state
+        # is the XOR of the keys of its boxes and its player, so a move updates it with two or four XORs.
+        rng = random.Random(ZOBRIST_SEED)
+        self.zobrist_box = [rng.getrandbits(62) for i in range(num_row * num_col)]
+        self.zobrist_player = [rng.getrandbits(62) for i in range(num_row * num_col)]
+        # index every cell once: cell (x, y) has index x * num_col + y
+        self.wall = bytearray(1 if matrix[x][y] == '#' else 0 for x in range(num_row) for y in range(num_col))
+        self.simple_deadlock = bytearray(1 if self.has_simple_deadlock[x][y] else 0
+                                         for x in range(num_row) for y in range(num_col))
+        self.goal_bits = self.pack(goal_pos)
+        self.moves = {-num_col: 'U', num_col: 'D', -1: 'L', 1: 'R'}
+        self.deadlock_db = DeadlockDatabase(deadlock_db, self.fingerprint()) if deadlock_db else None
+        self.learned_box_pos, self.learned_box_bits = None, 0  # the last box positions packed for the database
+        if self.packed:
+            if mode == "push":
+                self.player_start = self.index(player_pos)
+                # the cells inside the level: the player could walk there if there were no boxes
+                self.floor_cells = [i for i, r in enumerate(self.reachable(0, self.player_start)) if r]
+                self.corral_cache = dict()  # (boxes, player_pos) -> whether it is a corral deadlock
+                box_bits = self.pack(box_pos)
+                if macros:
+                    self.tunnel = self.find_tunnels()
+                    self.goal_rooms = self.find_goal_rooms(box_bits)
+                self.initial_state = PushState(box_bits, self.normalize(box_bits, self.player_start), None)
+            else:
+                self.initial_state = PackedState(self.pack(box_pos), self.index(player_pos), None)
+            self.initial_state.zobrist = self.zobrist_hash(iter_bits(self.initial_state.box_pos),
+                                                           self.initial_state.player_pos)
+            self.goal_key = self.goal_bits  # what is_final_state compares box_pos with
+        else:
+            self.initial_state = State(box_pos, player_pos, None)
+            self.initial_state.zobrist = self.zobrist_hash([self.index(box) for box in box_pos], self.index(player_pos))
+            self.goal_key = goal_pos
+        if self.stats:
+            self.instrument()
+
+    def instrument(self):
+        """
+        Replace the methods of the hot path of this object with wrappers counting their calls and timing them in
+        self.stats (the class is unchanged)
+        """
+        stats = self.stats
+        if self.packed:
+            moves = [("can_step", "can_step"), ("step", "step")]
+        else:
+            moves = [(name + "_" + direction, name) for name in ("can_go", "go")
+                     for direction in ("up", "down", "left", "right")]
+        methods = moves + [(name, name) for name in (
+            "search", "expand", "handle", "successors", "push_successors", "pull_predecessors", "reachable", "macro",
+            "corral_deadlock", "is_learned_deadlock", "has_freeze_deadlock", "has_packed_freeze_deadlock",
+            "construct_path", "construct_push_path")]
+        for attribute, name in methods:
+            if hasattr(self, attribute):
+                setattr(self, attribute, stats.timed(name, getattr(self, attribute)))
+        make_frontier = self.make_frontier
+        self.make_frontier = lambda: stats.watch_frontier(make_frontier())
+
+    def fingerprint(self):
+        """
+        @return: a hex digest identifying the walls and the goals of the level (not the boxes and the player), so
+        levels sharing a layout share their deadlock patterns
+        """
+        layout = "\n".join("".join('#' if self.wall[x * self.num_col + y] else
+                                    ('.' if (x, y) in self.goal_pos else ' ') for y in range(self.num_col))
+                           for x in range(self.num_row))
+        return hashlib.sha1(layout.encode()).hexdigest()
+
+    def is_learned_deadlock(self, box_pos, player, target=None):
+        """
+        Check a state against the deadlock patterns of the database
+        @param box_pos: the bitmask of box positions
+        @param player: the cell index of the player
+        @param target: the cell index the last push moved a box to, None to check every pattern
+        @return: True if the state contains a known deadlock pattern
+        """
+        for boxes, area in self.deadlock_db.candidates(box_pos, target):
+            if self.normalize(boxes, player) == area:
+                return True
+        return False
+
+    def is_learned_push_deadlock(self, box_pos, box, target):
+        """
+        is_learned_deadlock for the push of a box of a State (box positions as tuples). The box positions are packed
+        once per state: the four can_go_* checks of a state share the bitmask.
+        @param box_pos: the set of box positions of the state before the push
+        @param box: the position (x, y) of the pushed box, where the player stands after the push
+        @param target: the position (x, y) the box is pushed to
+        @return: True if the state after the push contains a known deadlock pattern
+        """
+        if box_pos is not self.learned_box_pos:
+            self.learned_box_pos, self.learned_box_bits = box_pos, self.pack(box_pos)
+        box, target = self.index(box), self.index(target)
+        return self.is_learned_deadlock(self.learned_box_bits ^ (1 << box) ^ (1 << target), box, target)
+
+    def learn_freeze_deadlock(self, frozen, player):
+        """
+        Record a small freeze deadlock found by a push in the deadlock database. The boxes looked at by the freeze
+        check can't move in any state holding them, whatever the other boxes, so they form a dead pattern.
+        @param frozen: the set of the cell indexes of the boxes looked at by the freeze check
+        @param player: the cell index of the player after the push
+        """
+        if len(frozen) <= self.learned_size:
+            boxes = sum(1 << box for box in frozen)
+            if self.deadlock_db.add(boxes, self.normalize(boxes, player)) and self.stats:
+                self.stats.count("learned")
+
+    def zobrist_hash(self, box_cells, player):
+        """
+        Compute the Zobrist hash of a state from scratch (only done for the initial state)
+        @param box_cells: an iterable of the cell indexes of the boxes
+        @param player: the cell index of the player
+        @return: the hash value
+        """
+        zobrist = self.zobrist_player[player]
+        for box in box_cells:
+            zobrist ^= self.zobrist_box[box]
+        return zobrist
+
+    def zobrist_move(self, zobrist, player, d, pushed):
+        """
+        Update the Zobrist hash of a state after a player step in O(1)
+        @param zobrist: the hash of the state before the step
+        @param player: the cell index of the player before the step
+        @param d: the difference of cell index of the step
+        @param pushed: whether the step pushes a box from player + d to player + 2 * d
+        @return: the hash of the new state
+        """
+        zobrist ^= self.zobrist_player[player] ^ self.zobrist_player[player + d]
+        if pushed:
+            zobrist ^= self.zobrist_box[player + d] ^ self.zobrist_box[player + 2 * d]
+        return zobrist
+
+    def make_frontier(self):
+        """
+        @return: a new empty frontier of the class selected by the frontier option
+        """
+        return FRONTIERS[self.frontier]()
+
+    def index(self, pos):
+        """
+        @param pos: a tuple (x, y)
+        @return: the cell index of pos
+        """
+        return pos[0] * self.num_col + pos[1]
+
+    def pack(self, positions):
+        """
+        @param positions: an iterable of tuples (x, y)
+        @return: the bitmask of the cells
+        """
+        bits = 0
+        for pos in positions:
+            bits |= 1 << self.index(pos)
+        return bits
+
+    def unpack(self, bits):
+        """
+        @param bits: a bitmask of cells
+        @return: the list of tuples (x, y) of the cells
+        """
+        return [divmod(i, self.num_col) for i in iter_bits(bits)]
+
+    def can_step(self, current_state, d):
+        """
+        can_go_* for PackedState
+        @param current_state: the current state object of searching
+        @param d: the difference of cell index of the move (-num_col, num_col, -1 or 1)
+        @return: a boolean value show that whether a new state is valid
+        """
+        t1 = current_state.player_pos + d
+        t2 = t1 + d
+        if t2 < 0 or t2 >= len(self.wall) or self.wall[t1]:
+            return False
+        box_pos = current_state.box_pos
+        if box_pos >> t1 & 1:
+            if self.wall[t2] or box_pos >> t2 & 1:
+                return False
+            new_box = box_pos ^ (1 << t1) ^ (1 << t2)
+            if self.deadlock_db and self.is_learned_deadlock(new_box, t1, t2):
+                if self.stats:
+                    self.stats.count("prune_learned")
+                return False
+            if self.simple_deadlock[t2]:
+                if self.stats:
+                    self.stats.count("prune_simple")
+                return False
+            frozen = set()
+            if self.has_packed_freeze_deadlock(t2, self.num_col, self.wall, self.simple_deadlock, new_box,
+                                               self.goal_bits, frozen):
+                if self.stats:
+                    self.stats.count("prune_freeze")
+                if self.deadlock_db is not None:
+                    self.learn_freeze_deadlock(frozen, t1)
+                return False
+        return True
+
+    def step(self, current_state, d, heuristic=None):
+        """
+        go_* for PackedState
+        @param current_state: the current state object of searching
+        @param d: the difference of cell index of the move (-num_col, num_col, -1 or 1)
+        @param heuristic: the heuristic function if we implement A* algorithm
+        @return: a state after the move
+        """
+        t1 = current_state.player_pos + d
+        new_box_pos = current_state.box_pos
+        pushed = new_box_pos >> t1 & 1
+        if pushed:
+            new_box_pos ^= (1 << t1) ^ (1 << (t1 + d))
+        zobrist = self.zobrist_move(current_state.zobrist, current_state.player_pos, d, pushed)
+        if heuristic:
+            new_gval = current_state.gval + 1
+            new_fval = new_gval + heuristic(new_box_pos, self.goal_pos)
+            return PackedState(new_box_pos, t1, current_state, new_gval, new_fval, zobrist)
+        return PackedState(new_box_pos, t1, current_state, zobrist=zobrist)
+
+    def reachable(self, box_pos, start):
+        """
+        Flood fill the area the player can walk to without pushing a box
+        @param box_pos: the bitmask of box positions
+        @param start: the cell index of the player
+        @return: a bytearray, reach[i] is 1 if the player can walk to cell i
+        """
+        wall = self.wall
+        reach = bytearray(len(wall))
+        reach[start] = 1
+        stack = [start]
+        dirs = (-self.num_col, self.num_col, -1, 1)
+        while stack:
+            cell = stack.pop()
+            for d in dirs:
+                n = cell + d
+                if not reach[n] and not wall[n] and not box_pos >> n & 1:
+                    reach[n] = 1
+                    stack.append(n)
+        return reach
+
+    def normalize(self, box_pos, start):
+        """
+        @param box_pos: the bitmask of box positions
+        @param start: the cell index of the player
+        @return: the smallest cell index the player can walk to, used as player_pos of a PushState
+        """
+        return self.reachable(box_pos, start).index(1)
+
+    def legal_pushes(self, box_pos, reach, boxes):
+        """
+        Generate the pushes the player can make without creating a simple or a freeze deadlock
+        @param box_pos: the bitmask of box positions
+        @param reach: the area the player can walk to, as returned by reachable
+        @param boxes: an iterable of the cell indexes of the boxes to try
+        @return: a generator of tuples (box, d, target, new_box_pos)
+        """
+        wall, simple_deadlock = self.wall, self.simple_deadlock
+        for box in boxes:
+            for d in self.moves:
+                target = box + d
+                # the player must reach the cell behind the box, the target must be free and not a deadlock
+                if not reach[box - d] or wall[target] or box_pos >> target & 1:
+                    continue
+                if simple_deadlock[target]:
+                    if self.stats:
+                        self.stats.count("prune_simple")
+                    continue
+                new_box_pos = box_pos ^ (1 << box) ^ (1 << target)
+                if self.deadlock_db and self.is_learned_deadlock(new_box_pos, box, target):
+                    if self.stats:
+                        self.stats.count("prune_learned")
+                    continue
+                frozen = set()
+                if self.has_packed_freeze_deadlock(target, self.num_col, wall, simple_deadlock, new_box_pos,
+                                                   self.goal_bits, frozen):
+                    if self.stats:
+                        self.stats.count("prune_freeze")
+                    if self.deadlock_db is not None:
+                        self.learn_freeze_deadlock(frozen, box)
+                    continue
+                yield box, d, target, new_box_pos
+
+    def push_successors(self, current_state, heuristic=None):
+        """
+        Generate the states reachable from a PushState by walking to a box and pushing it once
+        @param current_state: the current state object of searching
+        @param heuristic: the heuristic function if we implement A* algorithm
+        @return: the list of new states
+        """
+        box_pos = current_state.box_pos
+        reach = self.reachable(box_pos, current_state.player_pos)
+        boxes = iter_bits(box_pos)
+        if self.corral:
+            corral = self.find_pi_corral(box_pos, reach)
+            if corral is not None:
+                corral_boxes, barrier, interior = corral
+                if self.corral_deadlock(corral_boxes, interior, current_state.player_pos):
+                    self.corral_prunes += 1
+                    if self.stats:
+                        self.stats.count("prune_corral")
+                    return []
+                # some pushes into the corral are needed anyway, and they can't hurt the rest of the level:
+                # try them first and nothing else
+                boxes = barrier
+        successors = []
+        for box, d, target, new_box_pos in self.legal_pushes(box_pos, reach, boxes):
+            pushes = ((box, d),)
+            if self.macros:
+                pushes, new_box_pos = self.macro(pushes, new_box_pos)
+                box, d = pushes[-1]
+                target = box + d
+                box = pushes[0][0]
+            player = self.normalize(new_box_pos, pushes[-1][0])
+            zobrist = (current_state.zobrist ^ self.zobrist_player[current_state.player_pos] ^ self.zobrist_player[player]
+                       ^ self.zobrist_box[box] ^ self.zobrist_box[target])
+            new_state = PushState(new_box_pos, player, current_state, pushes, zobrist=zobrist)
+            if heuristic:
+                new_state.gval = current_state.gval + len(pushes)
+                new_state.fval = new_state.gval + heuristic(new_box_pos, self.goal_pos)
+            successors.append(new_state)
+        return successors
+
+    def find_tunnels(self):
+        """
+        Find the tunnel cells: tunnel[d][i] is 1 when cell i is floor with walls on both sides across direction d
+        @return: a dictionary direction -> bytearray
+        """
+        wall = self.wall
+        tunnel = dict()
+        for d in self.moves:
+            side = 1 if abs(d) == self.num_col else self.num_col
+            tunnel[d] = bytearray(len(wall))
+            for cell in self.floor_cells:
+                if wall[cell - side] and wall[cell + side]:
+                    tunnel[d][cell] = 1
+        return tunnel
+
+    def find_goal_rooms(self, box_bits):
+        """
+        Find the goal rooms: dead ends of the level behind a single entrance cell, holding goals but no box and not
+        the player. For each room a packing order of its goals is computed backwards (the last goal is one a box can
+        reach with all the other goals filled, and so on) along with the pushes bringing a box from the entrance to
+        each goal in that order.
+        @param box_bits: the bitmask of the initial box positions
+        @return: a dictionary entrance -> (outside cell, bitmask of the room cells, dictionary bitmask of the goals
+        already filled -> list of pushes (box, d) driving a box from the entrance to the next goal)
+        """
+        wall, moves = self.wall, self.moves
+        candidates = []
+        for entrance in self.floor_cells:
+            if self.goal_bits >> entrance & 1 or box_bits >> entrance & 1 or entrance == self.player_start:
+                continue
+            outside = self.reachable(1 << entrance, self.player_start)  # a box on the entrance blocks the way in
+            room = [cell for cell in self.floor_cells if not outside[cell] and cell != entrance]
+            doors = [entrance + d for d in moves if not wall[entrance + d] and outside[entrance + d]]
+            room_bits = sum(1 << cell for cell in room)
+            if room and len(doors) == 1 and room_bits & self.goal_bits and not room_bits & box_bits:
+                candidates.append((len(room), entrance, doors[0], room, room_bits))
+        rooms = dict()
+        taken = 0
+        for size, entrance, outside, room, room_bits in sorted(candidates):
+            if taken & (room_bits | 1 << entrance):
+                continue  # keep the innermost of nested rooms
+            allowed = room_bits | 1 << entrance | 1 << outside
+            filled = room_bits & self.goal_bits
+            order = []
+            while filled:
+                for goal in iter_bits(filled):
+                    pushes = self.room_pushes(entrance, outside, goal, filled ^ (1 << goal), allowed)
+                    if pushes is not None:
+                        filled ^= 1 << goal
+                        order.append((filled, pushes))
+                        break
+                else:
+                    break  # no packing order: no macro for this room
+            if not filled:
+                rooms[entrance] = (outside, room_bits, dict(order))
+                taken |= room_bits | 1 << entrance
+        return rooms
+
+    def room_pushes(self, entrance, outside, goal, others, allowed):
+        """
+        Find the pushes bringing a box from the entrance of a goal room to one goal, the player starting outside
+        @param entrance: the cell index of the room entrance, where the box is
+        @param outside: the cell index of the player, next to the entrance
+        @param goal: the cell index of the goal
+        @param others: the bitmask of the boxes already in the room
+        @param allowed: the bitmask of the cells the player and the box can use
+        @return: the list of pushes (box, d), or None if the goal can't be reached
+        """
+        start = (entrance, outside)
+        came_from = {start: None}
+        q = deque([start])
+        while q:
+            box, player = state = q.popleft()
+            if box == goal:
+                pushes = []
+                while came_from[state] is not None:
+                    state, push = came_from[state]
+                    if push is not None:
+                        pushes.append(push)
+                pushes.reverse()
+                return pushes
+            for d in self.moves:
+                n = player + d
+                if not allowed >> n & 1 or others >> n & 1:
+                    continue
+                if n == box:
+                    if not allowed >> (n + d) & 1 or others >> (n + d) & 1 or n + d == outside:
+                        continue
+                    new_state, push = (n + d, n), (box, d)
+                else:
+                    new_state, push = (box, n), None
+                if new_state not in came_from:
+                    came_from[new_state] = (state, push)
+                    q.append(new_state)
+        return None
+
+    def macro(self, pushes, box_pos):
+        """
+        Extend a push into a macro move: a box pushed into a tunnel with the player behind it is pushed on until it
+        leaves the tunnel, reaches a goal or gets blocked, and a box pushed onto the entrance of a goal room is
+        driven to the next goal of the room packing order
+        @param pushes: a tuple with the first push (box, d)
+        @param box_pos: the bitmask of box positions after the first push
+        @return: a tuple (pushes of the macro, bitmask of box positions after it)
+        """
+        box, d = pushes[0]
+        target = box + d
+        room = self.goal_rooms.get(target)
+        if room is not None and room[0] == box:
+            outside, room_bits, order = room
+            room_pushes = order.get(box_pos & room_bits)
+            if room_pushes is not None:
+                goal = room_pushes[-1][0] + room_pushes[-1][1]
+                return pushes + tuple(room_pushes), box_pos ^ (1 << target) ^ (1 << goal)
+        wall, simple_deadlock, tunnel = self.wall, self.simple_deadlock, self.tunnel[d]
+        while tunnel[box] and tunnel[target] and not self.goal_bits >> target & 1:
+            n = target + d
+            if wall[n] or box_pos >> n & 1 or simple_deadlock[n]:
+                break
+            new_box_pos = box_pos ^ (1 << target) ^ (1 << n)
+            if self.has_packed_freeze_deadlock(n, self.num_col, wall, simple_deadlock, new_box_pos,
+                                               self.goal_bits, set()):
+                break
+            pushes += ((target, d),)
+            box, target, box_pos = target, n, new_box_pos
+        return pushes, box_pos
+
+    def find_pi_corral(self, box_pos, reach):
+        """
+        Find a PI-corral. A corral is an area the player can't reach; areas only separated by boxes the player can't
+        touch are the same corral. Its barrier is the boxes touching both the corral and the player area. It is a PI-corral when every possible push of a barrier box goes into the corral
+        (I) and the player can reach every cell from where a barrier box can be pushed into the corral (P).
+        Corrals whose boxes and goals are all done are ignored.
+        @param box_pos: the bitmask of box positions
+        @param reach: the area the player can walk to, as returned by reachable
+        @return: a tuple (bitmask of the boxes touching the corral, list of barrier boxes, list of corral cells) for
+        the PI-corral with the fewest pushes, or None
+        """
+        wall, simple_deadlock, goal_bits = self.wall, self.simple_deadlock, self.goal_bits
+        label = [0] * len(wall)  # label[i]: the number of the corral cell i belongs to
+        best, best_pushes = None, None
+        number = 0
+        for cell in self.floor_cells:
+            if reach[cell] or label[cell] or box_pos >> cell & 1:
+                continue
+            number += 1
+            label[cell] = number
+            interior, corral_boxes, stack = [], 0, [cell]
+            while stack:
+                c = stack.pop()
+                if not box_pos >> c & 1:
+                    interior.append(c)
+                for d in self.moves:
+                    n = c + d
+                    if wall[n] or label[n]:
+                        continue
+                    if box_pos >> n & 1:
+                        corral_boxes |= 1 << n
+                        if not any(reach[n + e] for e in self.moves):  # an inner box: the corral goes on behind it
+                            label[n] = number
+                            stack.append(n)
+                    elif not reach[n]:
+                        label[n] = number
+                        stack.append(n)
+            # nothing to do in the corral: all its boxes and goals are done
+            if not corral_boxes & ~goal_bits and not any(goal_bits >> c & 1 for c in interior):
+                continue
+            barrier = [box for box in iter_bits(corral_boxes) if any(reach[box + d] for d in self.moves)]
+            pushes, pi_corral = 0, True
+            for box in barrier:
+                for d in self.moves:
+                    target = box + d
+                    if wall[target] or box_pos >> target & 1:
+                        continue
+                    if label[target] == number:
+                        if not wall[box - d] and not reach[box - d]:
+                            pi_corral = False  # P: a push into the corral the player can't get to
+                        elif reach[box - d] and not simple_deadlock[target]:
+                            pushes += 1
+                    elif reach[box - d] and not simple_deadlock[target]:
+                        pi_corral = False  # I: a barrier box can be pushed elsewhere
+            if pi_corral and pushes and (best is None or pushes < best_pushes):
+                best, best_pushes = (corral_boxes, barrier, interior), pushes
+        return best
+
+    def corral_deadlock(self, corral_boxes, interior, player):
+        """
+        Check with a small push search whether the boxes of a corral, alone in the level, can be solved. The corral
+        is not a deadlock as soon as these boxes are all on goals or the player gets into the corral.
+        @param corral_boxes: the bitmask of the boxes touching the corral
+        @param interior: the list of the corral cells
+        @param player: a cell index of the player area
+        @return: True if the corral is proven to be a deadlock, False if it isn't or the search hit corral_limit
+        """
+        start = (corral_boxes, self.normalize(corral_boxes, player))
+        proven = self.corral_cache.get(start)
+        if proven is not None:
+            return proven
+        proven = True
+        seen = {start}
+        q = deque([start])
+        while q:
+            box_pos, player = q.popleft()
+            reach = self.reachable(box_pos, player)
+            if not box_pos & ~self.goal_bits or any(reach[cell] for cell in interior) or len(seen) > self.corral_limit:
+                proven = False
+                break
+            for box, d, target, new_box_pos in self.legal_pushes(box_pos, reach, iter_bits(box_pos)):
+                key = (new_box_pos, self.normalize(new_box_pos, box))
+                if key not in seen:
+                    seen.add(key)
+                    q.append(key)
+        self.corral_cache[start] = proven
+        if proven and self.deadlock_db is not None:
+            self.deadlock_db.add(*start)
+        return proven
+
+    def walk(self, box_pos, start, target):
+        """
+        Find the shortest walk of the player between two cells without pushing a box
+        @param box_pos: the bitmask of box positions
+        @param start: the cell index where the player is
+        @param target: the cell index the player wants to reach
+        @return: the list of steps U, D, L, R
+        """
+        wall = self.wall
+        came_from = {start: None}
+        q = deque([start])
+        while q:
+            cell = q.popleft()
+            if cell == target:
+                break
+            for d in self.moves:
+                n = cell + d
+                if n not in came_from and not wall[n] and not box_pos >> n & 1:
+                    came_from[n] = cell
+                    q.append(n)
+        path = []
+        cell = target
+        while came_from[cell] is not None:
+            path.append(self.moves[cell - came_from[cell]])
+            cell = came_from[cell]
+        path.reverse()
+        return path
+
+    def construct_push_path(self, state):
+        """
+        Construct the path of player steps to a PushState by joining the walks between the pushes
+        @param state: the state to start construting the path
+        @return: The list of elements display the steps U, D, L, R conresponding to Up, Down, Left, Right
+        """
+        chain = []
+        while state.ancestor:
+            chain.append(state)
+            state = state.ancestor
+        return self.pushes_to_path([push for state in reversed(chain) for push in state.pushes])
+
+    def pushes_to_path(self, pushes):
+        """
+        Construct the path of player steps doing a list of pushes from the initial state
+        @param pushes: the list of pushes (box, d)
+        @return: The list of elements display the steps U, D, L, R conresponding to Up, Down, Left, Right
+        """
+        path = []
+        box_pos, player = self.initial_state.box_pos, self.player_start
+        for box, d in pushes:
+            path.extend(self.walk(box_pos, player, box - d))
+            path.append(self.moves[d])
+            box_pos ^= (1 << box) ^ (1 << (box + d))
+            player = box
+        return path
+
+    def can_go_up(self, current_state):
+        """
+        Check if player can go up to make a new state
+        @param current_state: the current state object of searching
+        @return: a boolean value show that whether a new state is valid
+        """
+        if self.packed:
+            return self.can_step(current_state, -self.num_col)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # The player can go up if all of the following checks are true:
+        # The player x-coordinate position greater than 1
+        # The above of player position is not a wall
+        # If the above player is a box then:
+        # The above of that box must not be a wall and a box
+        # The above of that box must not has any types of deadlocks
+        if x <= 1:
+            return False
+        t1 = self.matrix[x - 1][y]
+        t2 = self.matrix[x - 2][y]
+        box_pos = current_state.box_pos
+        if t1 == '#':
+            return False
+        elif (x - 1, y) in box_pos:
+            if t2 == '#' or (x - 2, y) in box_pos:
+                return False
+            if self.deadlock_db and self.is_learned_push_deadlock(box_pos, (x - 1, y), (x - 2, y)):
+                if self.stats:
+                    self.stats.count("prune_learned")
+                return False
+            if self.has_simple_deadlock[x - 2][y]:
+                if self.stats:
+                    self.stats.count("prune_simple")
+                return False
+            else:
+                new_box = box_pos.copy()
+                new_box.remove((x - 1, y))
+                new_box.add((x - 2, y))
+                frozen = set()
+                if self.has_freeze_deadlock((x - 2, y), self.matrix, new_box, self.goal_pos,
+                                            self.has_simple_deadlock, frozen):
+                    if self.stats:
+                        self.stats.count("prune_freeze")
+                    if self.deadlock_db is not None:
+                        self.learn_freeze_deadlock({self.index(box) for box in frozen}, self.index((x - 1, y)))
+                    return False
+        return True
+
+    def go_up(self, current_state, heuristic=None):
+        """
+        Move up the player and change the state
+        @param current_state: the current state object of searching
+        @param heuristic: the heuristic function if we implement A* algorithm
+        @return: a state after go up
+        """
+        if self.packed:
+            return self.step(current_state, -self.num_col, heuristic)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # create a set of tuples of box positions for a new state
+        new_box_pos = current_state.deep_copy_box_pos()
+        # delete all box position and add new box position
+        if (x - 1, y) in current_state.box_pos:
+            new_box_pos.remove((x - 1, y))
+            new_box_pos.add((x - 2, y))
+        zobrist = self.zobrist_move(current_state.zobrist, x * self.num_col + y, -self.num_col,
+                                    (x - 1, y) in current_state.box_pos)
+        # create g value and f value of new state by using heuristic function
+        if heuristic:
+            new_gval = current_state.gval + 1  # g value of new state = g value of current state + 1
+            new_fval = new_gval + heuristic(new_box_pos,
+                                            self.goal_pos)  # f value = g value + value of heuristic function of new state
+            return State(new_box_pos, (x - 1, y), current_state, new_gval, new_fval, zobrist)
+        return State(new_box_pos, (x - 1, y), current_state, zobrist=zobrist)
+
+    def can_go_down(self, current_state):
+        """
+        Check if player can go down to make a new state
+        @param current_state: the current state object of searching
+        @return: a boolean value show that whether a new state is valid
+        """
+        if self.packed:
+            return self.can_step(current_state, self.num_col)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # The player can go down if all of the following checks are true:
+        # The player x-coordinate position less than num_row - 2
+        # The above of under position is not a wall
+        # If the under player is a box then:
+        # The under of that box must not be a wall and a box
+        # The under of that box must not has any types of deadlocks
+        if x >= self.num_row - 2:
+            return False
+        t1 = self.matrix[x + 1][y]
+        t2 = self.matrix[x + 2][y]
+        box_pos = current_state.box_pos
+        if t1 == '#':
+            return False
+        elif (x + 1, y) in box_pos:
+            if t2 == '#' or (x + 2, y) in box_pos:
+                return False
+            if self.deadlock_db and self.is_learned_push_deadlock(box_pos, (x + 1, y), (x + 2, y)):
+                if self.stats:
+                    self.stats.count("prune_learned")
+                return False
+            if self.has_simple_deadlock[x + 2][y]:
+                if self.stats:
+                    self.stats.count("prune_simple")
+                return False
+            else:
+                new_box = box_pos.copy()
+                new_box.remove((x + 1, y))
+                new_box.add((x + 2, y))
+                frozen = set()
+                if self.has_freeze_deadlock((x + 2, y), self.matrix, new_box, self.goal_pos,
+                                            self.has_simple_deadlock, frozen):
+                    if self.stats:
+                        self.stats.count("prune_freeze")
+                    if self.deadlock_db is not None:
+                        self.learn_freeze_deadlock({self.index(box) for box in frozen}, self.index((x + 1, y)))
+                    return False
+        return True
+
+    def go_down(self, current_state, heuristic=None):
+        """
+        Move down the player and change the state
+        @param current_state: the current state object of searching
+        @param heuristic: the heuristic function if we implement A* algorithm
+        @return: a state after go down
+        """
+        if self.packed:
+            return self.step(current_state, self.num_col, heuristic)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # create a set of tuples of box positions for a new state
+        new_box_pos = current_state.deep_copy_box_pos()
+        # delete all box position and add new box position
+        if (x + 1, y) in current_state.box_pos:
+            new_box_pos.remove((x + 1, y))
+            new_box_pos.add((x + 2, y))
+        zobrist = self.zobrist_move(current_state.zobrist, x * self.num_col + y, self.num_col,
+                                    (x + 1, y) in current_state.box_pos)
+        # create g value and f value of new state by using heuristic function
+        if heuristic:
+            new_gval = current_state.gval + 1  # g value of new state = g value of current state + 1
+            new_fval = new_gval + heuristic(new_box_pos,
+                                            self.goal_pos)  # f value = g value + value of heuristic function of new state
+            return State(new_box_pos, (x + 1, y), current_state, new_gval, new_fval, zobrist)
+        return State(new_box_pos, (x + 1, y), current_state, zobrist=zobrist)
+
+    def can_go_left(self, current_state):
+        """
+        Check if player can go left to make a new state
+        @param current_state: the current state object of searching
+        @return: a boolean value show that whether a new state is valid
+        """
+        if self.packed:
+            return self.can_step(current_state, -1)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # The player can go down if all of the following checks are true:
+        # The player y-coordinate position greater than 1
+        # The left side of left position is not a wall
+        # If the left player is a box then:
+        # The left of that box must not be a wall and a box
+        # The left of that box must not has any types of deadlocks
+        if y <= 1:
+            return False
+        t1 = self.matrix[x][y - 1]
+        t2 = self.matrix[x][y - 2]
+        box_pos = current_state.box_pos
+        if t1 == '#':
+            return False
+        elif (x, y - 1) in box_pos:
+            if t2 == '#' or (x, y - 2) in box_pos:
+                return False
+            if self.deadlock_db and self.is_learned_push_deadlock(box_pos, (x, y - 1), (x, y - 2)):
+                if self.stats:
+                    self.stats.count("prune_learned")
+                return False
+            if self.has_simple_deadlock[x][y - 2]:
+                if self.stats:
+                    self.stats.count("prune_simple")
+                return False
+            else:
+                new_box = box_pos.copy()
+                new_box.remove((x, y - 1))
+                new_box.add((x, y - 2))
+                frozen = set()
+                if self.has_freeze_deadlock((x, y - 2), self.matrix, new_box, self.goal_pos,
+                                            self.has_simple_deadlock, frozen):
+                    if self.stats:
+                        self.stats.count("prune_freeze")
+                    if self.deadlock_db is not None:
+                        self.learn_freeze_deadlock({self.index(box) for box in frozen}, self.index((x, y - 1)))
+                    return False
+        return True
+
+    def go_left(self, current_state, heuristic=None):
+        """
+        Move left the player and change the state
+        @param current_state: the current state object of searching
+        @param heuristic: the heuristic function if we implement A* algorithm
+        @return: a state after go left
+        """
+        if self.packed:
+            return self.step(current_state, -1, heuristic)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # create a set of tuples of box positions for a new state
+        new_box_pos = current_state.deep_copy_box_pos()
+        # delete all box position and add new box position
+        if (x, y - 1) in current_state.box_pos:
+            new_box_pos.remove((x, y - 1))
+            new_box_pos.add((x, y - 2))
+        zobrist = self.zobrist_move(current_state.zobrist, x * self.num_col + y, -1,
+                                    (x, y - 1) in current_state.box_pos)
+        # create g value and f value of new state by using heuristic function
+        if heuristic:
+            new_gval = current_state.gval + 1  # g value of new state = g value of current state + 1
+            new_fval = new_gval + heuristic(new_box_pos,
+                                            self.goal_pos)  # f value = g value + value of heuristic function of new state
+            return State(new_box_pos, (x, y - 1), current_state, new_gval, new_fval, zobrist)
+        return State(new_box_pos, (x, y - 1), current_state, zobrist=zobrist)
+
+    def can_go_right(self, current_state):
+        """
+        Check if player can go right to make a new state
+        @param current_state: the current state object of searching
+        @return: a boolean value show that whether a new state is valid
+        """
+        if self.packed:
+            return self.can_step(current_state, 1)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # The player can go down if all of the following checks are true:
+        # The player y-coordinate position less than number of column - 2
+        # The right side of left position is not a wall
+        # If the right player is a box then:
+        # The right of that box must not be a wall and a box
+        # The right of that box must not has any types of deadlocks
+        if y >= self.num_col - 2:
+            return False
+        t1 = self.matrix[x][y + 1]
+        t2 = self.matrix[x][y + 2]
+        box_pos = current_state.box_pos
+        if t1 == '#':
+            return False
+        elif (x, y + 1) in box_pos:
+            if t2 == '#' or (x, y + 2) in box_pos:
+                return False
+            if self.deadlock_db and self.is_learned_push_deadlock(box_pos, (x, y + 1), (x, y + 2)):
+                if self.stats:
+                    self.stats.count("prune_learned")
+                return False
+            if self.has_simple_deadlock[x][y + 2]:
+                if self.stats:
+                    self.stats.count("prune_simple")
+                return False
+            else:
+                new_box = box_pos.copy()
+                new_box.remove((x, y + 1))
+                new_box.add((x, y + 2))
+                frozen = set()
+                if self.has_freeze_deadlock((x, y + 2), self.matrix, new_box, self.goal_pos,
+                                            self.has_simple_deadlock, frozen):
+                    if self.stats:
+                        self.stats.count("prune_freeze")
+                    if self.deadlock_db is not None:
+                        self.learn_freeze_deadlock({self.index(box) for box in frozen}, self.index((x, y + 1)))
+                    return False
+        return True
+
+    def go_right(self, current_state, heuristic=None):
+        """
+        Move left the player and change the state
+        @param current_state: the current state object of searching
+        @param heuristic: the heuristic function if we implement A* algorithm
+        @return: a state after go right
+        """
+        if self.packed:
+            return self.step(current_state, 1, heuristic)
+        x = current_state.player_pos[0]
+        y = current_state.player_pos[1]
+        # create a set of tuples of box positions for a new state
+        new_box_pos = current_state.deep_copy_box_pos()
+        # delete all box position and add new box position
+        if (x, y + 1) in current_state.box_pos:
+            new_box_pos.remove((x, y + 1))
+            new_box_pos.add((x, y + 2))
+        zobrist = self.zobrist_move(current_state.zobrist, x * self.num_col + y, 1,
+                                    (x, y + 1) in current_state.box_pos)
+        # create g value and f value of new state by using heuristic function
+        if heuristic:
+            new_gval = current_state.gval + 1  # g value of new state = g value of current state + 1
+            new_fval = new_gval + heuristic(new_box_pos,
+                                            self.goal_pos)  # f value = g value + value of heuristic function of new state
+            return State(new_box_pos, (x, y + 1), current_state, new_gval, new_fval, zobrist)
+        return State(new_box_pos, (x, y + 1), current_state, zobrist=zobrist)
+
+    def construct_path(self, state):
+        """
+        Construct the path to goal state
+        @param state: the state to start construting the path
+        @return: The list of elements display the steps U, D, L, R conresponding to Up, Down, Left, Right
+        """
+        if self.mode == "push":
+            return self.construct_push_path(state)
+        path = list()  # initilize list of path
+        if self.packed:
+            while state.ancestor:
+                path.append(self.moves[state.player_pos - state.ancestor.player_pos])
+                state = state.ancestor
+            path.reverse()
+            return path
+        # Loop to go back to ancestor nodes until reaching initial node
+        while state.ancestor:
+            x1 = state.ancestor.player_pos[0]
+            y1 = state.ancestor.player_pos[1]
+            x2 = state.player_pos[0]
+            y2 = state.player_pos[1]
+            if x2 > x1:
+                path.insert(0, 'D')
+            elif x2 < x1:
+                path.insert(0, 'U')
+            elif y2 > y1:
+                path.insert(0, 'R')
+            else:
+                path.insert(0, 'L')
+            state = state.ancestor
+        return path
+
+    @abstractmethod
+    def search(self):
+        """
+        Abstract method for Search class
+        """
+        pass
+
+
+class BFS(Search):
+    default_frontier = "deque"
+
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options):
+        """
+        Creat a new BFS Search object
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param options: keyword options of Search (packed, mode, frontier, corral, corral_limit, deadlock_db,
+        macros, budget, progress, stats)
+        """
+        super().__init__(num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options)
+
+    def handle(self, new_state, closed_set, frontier):
+        """
+        Handle closed_set and frontier queue after making a move
+        @param new_state: a state after making a move
+        @param closed_set: includes all nodes which are in the frontier queue or not in frontier queue but were explored
+        @param frontier: a FIFO queue of states (nodes)
+        """
+        # If this is the first time we have explored this state (not in closed_set):
+        # Add this state to closed_set
+        # Add this state to frontier queue
+        if new_state not in closed_set:
+            closed_set.add(new_state)
+            frontier.put(new_state)
+        elif self.stats:
+            self.stats.count("duplicates")
+
+    def expand(self, state, closed_set, frontier):
+        """
+        Function to expand all neighbors of a state
+        @param state: a state to be expanded
+        @param closed_set: includes all nodes which are in the frontier queue or not in frontier queue but were explored
+        @param frontier: a FIFO queue of states (nodes)
+        """
+        if self.mode == "push":
+            for new_state in self.push_successors(state):
+                self.handle(new_state, closed_set, frontier)
+            return
+        if self.can_go_up(state):
+            new_state = self.go_up(state)
+            self.handle(new_state, closed_set, frontier)
+        if self.can_go_right(state):
+            new_state = self.go_right(state)
+            self.handle(new_state, closed_set, frontier)
+        if self.can_go_left(state):
+            new_state = self.go_left(state)
+            self.handle(new_state, closed_set, frontier)
+        if self.can_go_down(state):
+            new_state = self.go_down(state)
+            self.handle(new_state, closed_set, frontier)
+
+    def search(self):
+        """
+        Execute BFS algorithm
+        @return: the list of steps that the player should follow to reach the goal state
+        @return: the number of expanded nodes (number of nodes dequeued from the queue during searching process)
+        @return: the number of explored nodes (total number of nodes explored during searching process)
+        """
+        frontier = self.make_frontier() # the FIFO queue
+        frontier.put(self.initial_state)
+        closed_set = set() # the set contains all nodes explored during searching process
+        closed_set.add(self.initial_state)
+        expanded_num = 0 # initialize number of expanded node as 0
+        if self.budget:
+            self.budget.start()
+        # Repeat below steps until the frontier is empty:
+            # Dequeue node from frontier
+            # Check if it is goal state => True => Return solution
+            # Expand all valid neighbors of current state
+        while not frontier.empty():
+            if self.budget and self.budget.exceeded(expanded_num):
+                return ["Budget exceeded"], expanded_num, len(closed_set)
+            expanded_num += 1
+            if self.progress and expanded_num % self.progress_every == 0:
+                self.progress(expanded_num, len(closed_set), len(frontier))
+            current_state = frontier.get() #get the head node of the queue
+            if current_state.is_final_state(self.goal_key):
+                path = self.construct_path(current_state)
+                return path, expanded_num, len(closed_set)
+            self.expand(current_state, closed_set, frontier)
+        return ["Impossible"], expanded_num, len(closed_set)
+
+
+class BidirectionalBFS(Search):
+    default_frontier = "deque"
+
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options):
+        """
+        Creat a new BidirectionalBFS Search object. It always uses the push mode: the forward search pushes boxes
+        from the initial state, the backward search pulls boxes from the goal configurations, and the search stops
+        when a state is reached by both.
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param options: keyword options of Search (frontier, corral, corral_limit, deadlock_db, macros, budget,
+        progress, stats), the pruning options only apply to the forward search
+        """
+        if options.setdefault("mode", "push") != "push":
+            raise ValueError("the bidirectional search needs the push mode")
+        super().__init__(num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options)
+
+    def goal_states(self):
+        """
+        @return: the list of goal states: all boxes on goals, one state for each area where the player can end
+        """
+        if bin(self.initial_state.box_pos).count('1') != bin(self.goal_bits).count('1'):
+            return []  # more goals than boxes: too many goal configurations, only search forward
+        states, seen = [], set()
+        for cell in self.floor_cells:
+            if self.goal_bits >> cell & 1:
+                continue
+            player = self.normalize(self.goal_bits, cell)
+            if player not in seen:
+                seen.add(player)
+                states.append(PushState(self.goal_bits, player, None))
+        return states
+
+    def pull_predecessors(self, current_state):
+        """
+        Generate the states from where a single push leads to a state, by pulling one box. The pushes attribute of
+        a new state holds the push going back to current_state.
+        @param current_state: a state of the backward search
+        @return: the list of new states
+        """
+        box_pos = current_state.box_pos
+        wall = self.wall
+        reach = self.reachable(box_pos, current_state.player_pos)
+        predecessors = []
+        for box in iter_bits(box_pos):
+            for d in self.moves:
+                # the player stands next to the box at box + d and steps back to box + 2 * d, pulling the box along
+                near, far = box + d, box + 2 * d
+                if not reach[near] or wall[far] or box_pos >> far & 1:
+                    continue
+                new_box_pos = box_pos ^ (1 << box) ^ (1 << near)
+                predecessors.append(PushState(new_box_pos, self.normalize(new_box_pos, far), current_state,
+                                              ((near, -d),)))
+        return predecessors
+
+    def search(self):
+        """
+        Execute bidirectional BFS algorithm: expand one whole layer of the smaller of the two frontiers at a time
+        until a state of one search is found in the other
+        @return: the list of steps that the player should follow to reach the goal state
+        @return: the number of expanded nodes (of both searches)
+        @return: the number of explored nodes (of both searches)
+        """
+        forward = {self.initial_state.key(): self.initial_state}
+        backward = {state.key(): state for state in self.goal_states()}
+        forward_layer, backward_layer = [self.initial_state], list(backward.values())
+        expanded_num = 0
+        meeting = self.initial_state.key() if self.initial_state.key() in backward else None
+        if self.initial_state.is_final_state(self.goal_key):
+            return [], 1, 1
+        if self.budget:
+            self.budget.start()
+        while meeting is None and forward_layer and (backward_layer or not backward):
+            # without goal states (more goals than boxes) the forward search runs alone until it reaches a goal
+            if backward and len(backward_layer) < len(forward_layer):
+                seen, other, layer, successors = backward, forward, backward_layer, self.pull_predecessors
+            else:
+                seen, other, layer, successors = forward, backward, forward_layer, self.push_successors
+            next_layer = []
+            for state in layer:
+                if self.budget and self.budget.exceeded(expanded_num):
+                    return ["Budget exceeded"], expanded_num, len(forward) + len(backward)
+                expanded_num += 1
+                if self.progress and expanded_num % self.progress_every == 0:
+                    self.progress(expanded_num, len(forward) + len(backward), len(layer) + len(next_layer))
+                for new_state in successors(state):
+                    key = new_state.key()
+                    if key in seen:
+                        if self.stats:
+                            self.stats.count("duplicates")
+                        continue
+                    seen[key] = new_state
+                    next_layer.append(new_state)
+                    if key in other or (not backward and new_state.is_final_state(self.goal_key)):
+                        meeting = key
+                        break
+                if meeting is not None:
+                    break
+            if self.stats:
+                self.stats.frontier_size(len(next_layer))
+            if seen is forward:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+        explored_num = len(forward) + len(backward)
+        if meeting is None:
+            return ["Impossible"], expanded_num, explored_num
+        pushes = []
+        state = forward[meeting]
+        while state.ancestor:
+            pushes.extend(reversed(state.pushes))
+            state = state.ancestor
+        pushes.reverse()
+        state = backward.get(meeting)
+        while state is not None and state.ancestor:
+            pushes.extend(state.pushes)
+            state = state.ancestor
+        return self.pushes_to_path(pushes), expanded_num, explored_num
+
+
+class AStar(Search):
+    default_frontier = "heap"
+
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options):
+        """
+        Creat a new AStar Search object
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param options: keyword options of Search (packed, mode, frontier, corral, corral_limit, deadlock_db,
+        macros, budget, progress, stats), tt_size: the maximum number of entries of the transposition table (None for
+        no limit; it does not bound the memory of the search, see TranspositionTable), heuristic: "distance" (sum of
+        the push distances of each box to its nearest goal, the default), "manhattan" (same with manhattan distances,
+        walls ignored) or "matching" (minimum cost assignment of boxes to goals over push distances), and weight: the
+        factor of the heuristic in f (1 for A*, greater for weighted A*, which finds longer solutions faster; a very
+        large weight gives greedy search). The bucket frontier only takes an integer weight, and keeps one bucket per
+        f value up to the largest one, so use the heap frontier with a large weight.
+        """
+        self.tt_size = options.pop("tt_size", None)
+        self.weight = options.pop("weight", 1)
+        self.heuristic_type = options.pop("heuristic", "distance")
+        if self.heuristic_type not in ("distance", "manhattan", "matching"):
+            raise ValueError("unknown heuristic: %r" % (self.heuristic_type,))
+        super().__init__(num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options)
+        if self.frontier == "bucket" and self.weight != int(self.weight):
+            raise ValueError("the bucket frontier needs integer f values, so an integer weight: %r" % (self.weight,))
+        if self.heuristic_type == "matching":
+            self.matching_cache = dict()
+            self.heuristic = self.matching_heuristic
+        # the heuristic term of a box only depends on its cell, so look it up in a table
+        if self.heuristic_type == "manhattan":
+            self.box_cost = [min([self.manhattan(x, y, goal[0], goal[1]) for goal in goal_pos])
+                             for x in range(num_row) for y in range(num_col)]
+        else:
+            self.box_cost = self.box_distance
+        if self.weight != 1:
+            unweighted = self.heuristic
+            self.heuristic = lambda box_pos, goal_pos: self.weight * unweighted(box_pos, goal_pos)
+        if self.stats:
+            self.heuristic = self.stats.timed("heuristic", self.heuristic)
+        # initialize g value and f value for initial state
+        self.initial_state.gval = 0
+        self.initial_state.fval = self.heuristic(self.initial_state.box_pos, goal_pos)
+
+    def handle(self, new_state, table, frontier):
+        """
+        Handle the transposition table and frontier queue after making a move
+        @param new_state: a state after making a move
+        @param table: the TranspositionTable of all states that have been explored so far
+        @param frontier: a Priority queue of states (nodes)
+        """
+        # The heuristic is INF when the boxes can't be assigned to the goals: prune the state
+        if new_state.fval == INF:
+            if self.stats:
+                self.stats.count("prune_heuristic")
+            return
+        # If this is the first time we have explored this state (not in the table):
+        # Add this state to the table and to the frontier queue
+        key = new_state.key()
+        slot = table.lookup(key)
+        if slot is None:
+            table.insert(key, new_state.gval)
+            frontier.put(new_state)
+        elif new_state.gval < table.gval[slot]:
+            # If this state was explored before with a greater g value, record the new g value and push the new state.
+            # The old copy stays in the frontier and is skipped when it is dequeued.
+            table.reopen(slot, new_state.gval)
+            frontier.put(new_state)
+            if self.stats:
+                self.stats.count("reopenings")
+        elif self.stats:
+            self.stats.count("duplicates")
+
+    def expand(self, state, table, frontier):
+        """
+        Function to expand all neighbors of a state
+        @param state: a state to be expanded
+        @param table: the TranspositionTable of all states that have been explored so far
+        @param frontier: a Priority queue of states (nodes)
+        """
+        if self.mode == "push":
+            for new_state in self.push_successors(state, self.heuristic):
+                self.handle(new_state, table, frontier)
+            return
+        if self.can_go_up(state):
+            new_state = self.go_up(state, self.heuristic)
+            self.handle(new_state, table, frontier)
+        if self.can_go_right(state):
+            new_state = self.go_right(state, self.heuristic)
+            self.handle(new_state, table, frontier)
+        if self.can_go_left(state):
+            new_state = self.go_left(state, self.heuristic)
+            self.handle(new_state, table, frontier)
+        if self.can_go_down(state):
+            new_state = self.go_down(state, self.heuristic)
+            self.handle(new_state, table, frontier)
+
+    def manhattan(self, x1, y1, x2, y2):
+        """
+        Calculate manhattan distance
+        @param x1: x-coordinate of object 1
+        @param y1: y-coordinate of object 1
+        @param x2: x-coordinate of object 2
+        @param y2: y-coordinate of object 2
+        @return: manhattan distance of 2 objects
+        """
+        return abs(x1 - x2) + abs(y1 - y2)
+
+    def heuristic(self, box_pos, goal_pos):
+        """
+        Heuristic function for A Star Algorithm
+        @param box_pos: A set of tuples which displays the positions of boxes (a bitmask in packed mode)
+        @param goal_pos: a set of tuple displays positions of the goals
+        @return: a heuristic value (h value)
+        """
+        sum = 0
+        # for each box position, look up its minimum distance among the distances to all the goals (box_cost).
+        # After that, calculate the sum of all that minimum distance distances
+        if self.packed:
+            for i in iter_bits(box_pos):
+                sum = sum + self.box_cost[i]
+            return sum
+        for box in box_pos:
+            sum = sum + self.box_cost[box[0] * self.num_col + box[1]]
+        return sum
+
+    def matching_heuristic(self, box_pos, goal_pos):
+        """
+        Heuristic function for A Star Algorithm: the minimum total number of pushes when each box goes to a different
+        goal (other boxes ignored). It is INF when no such assignment exists, which proves a deadlock.
+        @param box_pos: A set of tuples which displays the positions of boxes (a bitmask in packed mode)
+        @param goal_pos: a set of tuple displays positions of the goals
+        @return: a heuristic value (h value)
+        """
+        key = box_pos if self.packed else frozenset(box_pos)
+        h = self.matching_cache.get(key)
+        if h is None:
+            cells = iter_bits(box_pos) if self.packed else [self.index(box) for box in box_pos]
+            cost = [[distance[cell] for distance in self.goal_distances] for cell in cells]
+            h = min_cost_matching(cost)
+            if len(self.matching_cache) >= 100000:  # the cache only has to cover the recent box configurations
+                self.matching_cache.clear()
+            self.matching_cache[key] = h
+        return h
+
+    def search(self):
+        """
+        Execute A* search algorithm
+        @return: the list of steps that the player should follow to reach the goal state
+        @return: the number of expanded nodes (number of nodes dequeued from the queue during searching process)
+        @return: the number of explored nodes (total number of nodes explored during searching process)
+        """
+        if self.initial_state.fval == INF:  # a box can't reach any goal
+            return ["Impossible"], 0, 1
+        frontier = self.make_frontier() # the priority queue
+        frontier.put(self.initial_state)
+        # the table of g values and open/closed flags of all nodes explored during searching process
+        table = TranspositionTable(self.tt_size)
+        table.insert(self.initial_state.key(), self.initial_state.gval)
+        expanded_num = 0 # initialize number of expanded node as 0
+        if self.budget:
+            self.budget.start()
+        # Repeat below steps until the frontier is empty:
+            # Dequeue node from frontier, skip it if it is stale (closed, or a cheaper copy was queued later)
+            # Check if it is goal state => True => Return solution
+            # Expand all valid neighbors of current state
+        while not frontier.empty():
+            current_state = frontier.get() # get the node with highest priority (lowest cost)
+            slot = table.lookup(current_state.key())
+            # slot is None when the state was closed and then replaced in a bounded table
+            if slot is None or table.flag[slot] == TranspositionTable.CLOSED or current_state.gval > table.gval[slot]:
+                if self.stats:
+                    self.stats.count("stale")
+                continue
+            if self.budget and self.budget.exceeded(expanded_num):
+                return ["Budget exceeded"], expanded_num, table.inserted
+            expanded_num += 1
+            if self.progress and expanded_num % self.progress_every == 0:
+                self.progress(expanded_num, table.inserted, len(frontier))
+            table.close(slot)
+            if current_state.is_final_state(self.goal_key):
+                path = self.construct_path(current_state)
+                return path, expanded_num, table.inserted
+            self.expand(current_state, table, frontier)
+        return ["Impossible"], expanded_num, table.inserted
+
+
+class IDAStar(AStar):
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options):
+        """
+        Creat a new IDAStar Search object. It uses the heuristic functions of AStar but no frontier and no
+        transposition table, so the memory grows with the depth of the solution and not with the number of states.
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param options: keyword options of AStar (heuristic and the options of Search) and cache_size: the maximum
+        number of entries of a cache of the smallest g value of the states met in the current iteration, used to cut
+        transpositions (None for no cache)
+        """
+        self.cache_size = options.pop("cache_size", None)
+        super().__init__(num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options)
+        self.expanded_num = 0
+        self.explored_num = 0
+
+    def successors(self, state):
+        """
+        @param state: a state to be expanded
+        @return: the list of its neighbors, with g and f values, the most promising first
+        """
+        if self.mode == "push":
+            new_states = self.push_successors(state, self.heuristic)
+        else:
+            new_states = []
+            if self.can_go_up(state):
+                new_states.append(self.go_up(state, self.heuristic))
+            if self.can_go_right(state):
+                new_states.append(self.go_right(state, self.heuristic))
+            if self.can_go_left(state):
+                new_states.append(self.go_left(state, self.heuristic))
+            if self.can_go_down(state):
+                new_states.append(self.go_down(state, self.heuristic))
+        new_states.sort(key=lambda new_state: new_state.fval)
+        return new_states
+
+    def depth_first(self, threshold):
+        """
+        Depth-first search of the states whose f value is at most threshold
+        @param threshold: the f value bound of this iteration
+        @return: the goal state if one was found, else None
+        @return: the smallest f value greater than threshold met during the iteration (INF if none, or if the
+        budget is exceeded)
+        """
+        root = self.initial_state
+        on_path = {root.key()}  # the states of the current path, to avoid cycles
+        cache = dict() if self.cache_size else None
+        next_threshold = INF
+        self.expanded_num += 1
+        stack = [(root, iter(self.successors(root)))]
+        while stack:
+            state, children = stack[-1]
+            child = next(children, None)
+            if child is None:  # all neighbors done: backtrack
+                stack.pop()
+                on_path.discard(state.key())
+                continue
+            self.explored_num += 1
+            if child.fval > threshold:
+                next_threshold = min(next_threshold, child.fval)
+                continue
+            key = child.key()
+            if key in on_path:
+                continue
+            if cache is not None:
+                # a state already met with a smaller or equal g value in this iteration has nothing new to offer
+                gval = cache.get(key)
+                if gval is not None and gval <= child.gval:
+                    if self.stats:
+                        self.stats.count("duplicates")
+                    continue
+                if len(cache) >= self.cache_size:
+                    cache.clear()
+                cache[key] = child.gval
+            if child.is_final_state(self.goal_key):
+                return child, next_threshold
+            if self.budget and self.budget.exceeded(self.expanded_num):
+                return None, INF
+            self.expanded_num += 1
+            if self.progress and self.expanded_num % self.progress_every == 0:
+                self.progress(self.expanded_num, self.explored_num, len(stack))
+            on_path.add(key)
+            stack.append((child, iter(self.successors(child))))
+            if self.stats:
+                self.stats.frontier_size(len(stack))
+        return None, next_threshold
+
+    def search(self):
+        """
+        Execute IDA* search algorithm: depth-first searches bounded by f, raising the bound to the smallest f value
+        that exceeded it until a goal state is found
+        @return: the list of steps that the player should follow to reach the goal state
+        @return: the number of expanded nodes (summed over all iterations)
+        @return: the number of explored nodes (summed over all iterations)
+        """
+        self.expanded_num, self.explored_num = 0, 1
+        if self.initial_state.fval == INF:  # a box can't reach any goal
+            return ["Impossible"], 0, 1
+        if self.initial_state.is_final_state(self.goal_key):
+            return [], 1, 1
+        threshold = self.initial_state.fval
+        if self.budget:
+            self.budget.start()
+        while threshold != INF:
+            goal_state, threshold = self.depth_first(threshold)
+            if goal_state is not None:
+                return self.construct_path(goal_state), self.expanded_num, self.explored_num
+            if self.budget and self.budget.reason:
+                return ["Budget exceeded"], self.expanded_num, self.explored_num
+        return ["Impossible"], self.expanded_num, self.explored_num
+
+
+def hda_worker(rank, level, options, inboxes, sent, received, idle, expanded, explored, bound, results, done,
+               batch_size):
+    """
+    Main loop of a worker process of ParallelAStar. The worker owns the states whose Zobrist hash modulo the number
+    of workers is rank: it keeps their g values and its own open list, expands them and sends every new state to its
+    owner. A state travels as a tuple (box_pos, player_pos, gval, fval, zobrist, history) where history is the string
+    of steps (step mode) or the tuple of pushes (push mode) from the initial state.
+    @param rank: the number of this worker
+    @param level: the tuple (num_row, num_col, matrix, box_pos, goal_pos, player_pos) of the level
+    @param options: the keyword options of the AStar object built by the worker
+    @param inboxes: the queues of batches of states, one per worker
+    @param sent, received: shared arrays counting the batches put in and taken out of the queues: sent[rank] is only
+    written by the worker rank, for the batches it sends, and received[rank] for the batches it takes, so that no
+    increment is lost between processes (the parent process puts the initial state with the counter
+    sent[len(inboxes)])
+    @param idle: shared array, idle[rank] is 1 while the worker has nothing to do
+    @param expanded, explored: shared arrays receiving the counters of the worker
+    @param bound: shared value, the number of steps (or pushes) of the best solution found so far
+    @param results: the queue receiving the (gval, history) of every solution better than bound
+    @param done: the event set by the parent process when the search is over
+    @param batch_size: the number of states sent together to a worker
+    """
+    search = AStar(*level, **options)
+    workers = len(inboxes)
+    push_mode = search.mode == "push"
+    table = dict()  # state key -> smallest g value seen
+    frontier = []
+    counter = itertools.count()
+    outboxes = [[] for i in range(workers)]
+    expanded_num = 0
+
+    def flush(owner):
+        sent[rank] += 1
+        inboxes[owner].put(outboxes[owner])
+        outboxes[owner] = []
+
+    def receive(batch):
+        for box_pos, player_pos, gval, fval, zobrist, history in batch:
+            key = (player_pos, box_pos)
+            if table.get(key, INF) <= gval:
+                continue
+            table[key] = gval
+            heapq.heappush(frontier, (fval, -gval, next(counter), box_pos, player_pos, zobrist, history))
+
+    while not done.is_set():
+        try:
+            while True:
+                batch = inboxes[rank].get_nowait()
+                idle[rank] = 0
+                received[rank] += 1
+                receive(batch)
+        except queue.Empty:
+            pass
+        if frontier and frontier[0][0] < bound.value:
+            fval, gval, count, box_pos, player_pos, zobrist, history = heapq.heappop(frontier)
+            gval = -gval
+            if gval > table[(player_pos, box_pos)]:
+                continue  # a cheaper copy was queued later
+            expanded_num += 1
+            if box_pos == search.goal_key:
+                with bound.get_lock():
+                    if gval < bound.value:
+                        bound.value = gval
+                        results.put((gval, history))
+                continue
+            if push_mode:
+                state = PushState(box_pos, player_pos, None, (), gval, fval, zobrist)
+                new_states = [(new_state, history + new_state.pushes)
+                              for new_state in search.push_successors(state, search.heuristic)]
+            else:
+                state = PackedState(box_pos, player_pos, None, gval, fval, zobrist)
+                new_states = [(search.step(state, d, search.heuristic), history + move)
+                              for d, move in search.moves.items() if search.can_step(state, d)]
+            for new_state, new_history in new_states:
+                if new_state.fval >= bound.value:
+                    continue
+                item = (new_state.box_pos, new_state.player_pos, new_state.gval, new_state.fval, new_state.zobrist,
+                        new_history)
+                owner = new_state.zobrist % workers
+                if owner == rank:
+                    receive([item])
+                else:
+                    outboxes[owner].append(item)
+                    if len(outboxes[owner]) >= batch_size:
+                        flush(owner)
+            if expanded_num % batch_size == 0:  # don't let a partial batch wait too long
+                expanded[rank] = expanded_num  # progress for the budget of the parent process
+                for owner in range(workers):
+                    if outboxes[owner]:
+                        flush(owner)
+            continue
+        # nothing left under the bound: send what is waiting, then wait for work or for the end
+        for owner in range(workers):
+            if outboxes[owner]:
+                flush(owner)
+        frontier.clear()
+        idle[rank] = 1
+        try:
+            batch = inboxes[rank].get(timeout=0.01)
+        except queue.Empty:
+            continue
+        idle[rank] = 0
+        received[rank] += 1
+        receive(batch)
+    expanded[rank] = expanded_num
+    explored[rank] = len(table)
+
+
+class ParallelAStar(AStar):
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options):
+        """
+        Creat a new ParallelAStar Search object. The search itself runs in worker processes, each one building its
+        own AStar object from the same arguments; it needs the packed representation (step or push mode).
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param options: keyword options of AStar (heuristic and the options of Search, packed is always on), workers:
+        the number of worker processes (None for one per CPU) and batch_size: the number of states sent together
+        """
+        self.workers = options.pop("workers", None) or os.cpu_count() or 1
+        self.batch_size = options.pop("batch_size", 64)
+        options.pop("tt_size", None)
+        options["packed"] = True
+        self.level = (num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+        # the budget is checked by the parent process, the progress callback only makes sense there, and the stats
+        # only cover the parent process
+        self.options = {key: value for key, value in options.items() if key not in ("budget", "progress", "stats")}
+        super().__init__(num_row, num_col, matrix, box_pos, goal_pos, player_pos, **options)
+
+    def search(self):
+        """
+        Execute HDA* search algorithm. The workers expand their states in f order and prune every state whose f value
+        is not below the best solution found so far. Since the heuristic is admissible, the best solution is optimal
+        once no worker has a state left under that bound and no batch is on its way, which the parent process
+        detects by seeing all workers idle and as many batches received as sent, twice in a row.
+        @return: the list of steps that the player should follow to reach the goal state
+        @return: the number of expanded nodes (of all workers)
+        @return: the number of explored nodes (of all workers)
+        """
+        if self.initial_state.fval == INF:  # a box can't reach any goal
+            return ["Impossible"], 0, 1
+        workers = self.workers
+        context = multiprocessing.get_context()
+        inboxes = [context.Queue() for i in range(workers)]
+        sent, received = context.Array('l', workers + 1), context.Array('l', workers + 1)
+        idle, expanded, explored = context.Array('b', workers), context.Array('l', workers), context.Array('l', workers)
+        bound = context.Value('d', INF)
+        results, done = context.Queue(), context.Event()
+        processes = [context.Process(target=hda_worker, args=(rank, self.level, self.options, inboxes, sent, received,
+                                                              idle, expanded, explored, bound, results, done,
+                                                              self.batch_size))
+                     for rank in range(workers)]
+        for process in processes:
+            process.start()
+        state = self.initial_state
+        history = () if self.mode == "push" else ""
+        sent[workers] += 1
+        inboxes[state.zobrist % workers].put([(state.box_pos, state.player_pos, state.gval, state.fval, state.zobrist,
+                                              history)])
+        solutions = []
+        quiet = 0
+        if self.budget:
+            self.budget.start()
+        while quiet < 2:
+            if self.budget and self.budget.exceeded(sum(expanded), always=True):
+                break
+            time.sleep(0.01)
+            while True:
+                try:
+                    solutions.append(results.get_nowait())
+                except queue.Empty:
+                    break
+            before = (sum(sent), sum(received))
+            if all(idle) and before[0] == before[1] and (sum(sent), sum(received)) == before:
+                quiet += 1
+            else:
+                quiet = 0
+        done.set()
+        # keep reading the results while the workers exit: a process doesn't end before its queued data is read
+        while any(process.is_alive() for process in processes) or not results.empty():
+            try:
+                solutions.append(results.get(timeout=0.01))
+            except queue.Empty:
+                pass
+        for process in processes:
+            process.join()
+        expanded_num, explored_num = sum(expanded), sum(explored)
+        # over budget, the best solution found so far is kept (it may not be optimal)
+        if quiet < 2 and not solutions:
+            return ["Budget exceeded"], expanded_num, explored_num
+        if not solutions:
+            return ["Impossible"], expanded_num, explored_num
+        gval, history = min(solutions)
+        if self.mode == "push":
+            return self.pushes_to_path(list(history)), expanded_num, explored_num
+        return list(history), expanded_num, explored_num
+
+
+# the configurations raced by Portfolio: (name, key of ALGORITHMS, keyword options)
+PORTFOLIO = [
+    ("bfs", "bfs", {"mode": "push"}),
+    ("astar", "astar", {"mode": "push"}),
+    ("astar-matching", "astar", {"mode": "push", "heuristic": "matching"}),
+    ("weighted-astar", "astar", {"mode": "push", "weight": 3}),
+    ("greedy", "astar", {"mode": "push", "weight": 1000}),
+]
+
+
+def portfolio_worker(name, algorithm, level, options, results):
+    """
+    Run one configuration of a Portfolio in its own process
+    @param name: the name of the configuration
+    @param algorithm: a key of ALGORITHMS
+    @param level: the tuple (num_row, num_col, matrix, box_pos, goal_pos, player_pos) of the level
+    @param options: the keyword options of the search class
+    @param results: the queue receiving the tuple (name, path, expanded_num, explored_num)
+    """
+    path, expanded_num, explored_num = ALGORITHMS[algorithm](*level, **options).search()
+    results.put((name, path, expanded_num, explored_num))
+
+
+class Portfolio:
+    def __init__(self, num_row, num_col, matrix, box_pos, goal_pos, player_pos, configurations=None, deadline=None,
+                 best=False, budget=None):
+        """
+        Creat a new Portfolio object. It has the constructor and the search method of the search classes, but it
+        races several of them, each one in a process.
+        @param num_row: the number of rows of matrix
+        @param num_col: the number of columns of matrix
+        @param box_pos: A set of tuples which displays the positions of boxes
+        @param goal_pos: a set of tuple displays positions of the goals
+        @param player_pos: A tuple which displays the position of player in a state
+        @param configurations: the list of (name, key of ALGORITHMS, options) to race, PORTFOLIO by default
+        @param deadline: the number of seconds after which the remaining searches are stopped (None for no limit)
+        @param best: wait for every search (or the deadline) and keep the shortest solution, instead of the first
+        @param budget: a Budget checked by the parent process (its node limit is ignored): the race stops with
+        ["Budget exceeded"] if no solution was found yet
+        """
+        self.level = (num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+        self.configurations = configurations or PORTFOLIO
+        self.deadline = deadline
+        self.best = best
+        self.budget = budget
+        self.winner = None  # the name of the configuration whose result is returned
+
+    def search(self):
+        """
+        Start all the configurations, wait for the first solution (or for all of them, or the deadline, when best is
+        set) and kill the searches still running. A search proving that the level is impossible ends the race too.
+        @return: the list of steps that the player should follow to reach the goal state
+        @return: the number of expanded nodes of the winner
+        @return: the number of explored nodes of the winner
+        """
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = [context.Process(target=portfolio_worker, args=(name, algorithm, self.level, options, results))
+                     for name, algorithm, options in self.configurations]
+        for process in processes:
+            process.start()
+        end = None if self.deadline is None else time.monotonic() + self.deadline
+        found = None
+        pending = len(processes)
+        stopped = False  # by the deadline or the budget
+        if self.budget:
+            self.budget.start()
+        try:
+            while pending:
+                try:
+                    result = results.get(timeout=0.1)
+                except queue.Empty:
+                    if end is not None and time.monotonic() > end or self.budget and self.budget.exceeded(0):
+                        stopped = True
+                        break
+                    if not any(process.is_alive() for process in processes) and results.empty():
+                        break  # a search died without a result
+                    continue
+                pending -= 1
+                if result[1] == ["Impossible"]:
+                    found = result
+                    break
+                if found is None or len(result[1]) < len(found[1]):
+                    found = result
+                if not self.best:
+                    break
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+        if found is None:
+            return ["Budget exceeded" if stopped else "Impossible"], 0, 0
+        self.winner, path, expanded_num, explored_num = found
+        return path, expanded_num, explored_num
+
+
+BOARD_CHARS = frozenset("#@+$*. -_")  # the characters of a board row; '-' and '_' are floor in the SOK format
+
+
+def is_board_line(line):
+    """
+    @param line: a line of a level file, with or without its end of line
+    @return: True if the line is a row of a board: only board characters, with at least one wall
+    """
+    line = line.rstrip("\r\n")
+    return "#" in line and BOARD_CHARS.issuperset(line)
+
+
+def parse_level(lines):
+    """
+    Parse the rows of a board in a single pass
+    @param lines: an iterable of the rows of the board (with or without their end of line)
+    @return: the matrix of the level (every row padded with ' ' to the same length)
+    @return: the number of rows and the number of columns of the matrix
+    @return: a set of tuples of box positions, a set of tuples of goal positions and a tuple of player position
+    """
+    search_matrix = []
+    box_pos, goal_pos, player_pos = set(), set(), ()
+    for i, line in enumerate(lines):
+        row = list(line.rstrip().replace('-', ' ').replace('_', ' '))
+        for j, char in enumerate(row):
+            if char == '.':
+                goal_pos.add((i, j))
+            elif char == '*':
+                box_pos.add((i, j))
+                goal_pos.add((i, j))
+            elif char == '$':
+                box_pos.add((i, j))
+            elif char == '@':
+                player_pos = (i, j)
+            elif char == '+':
+                player_pos = (i, j)
+                goal_pos.add((i, j))
+        search_matrix.append(row)
+    num_row, num_col = len(search_matrix), max([len(row) for row in search_matrix])
+    # add extra " " character to some lines of matrix
+    for row in search_matrix:
+        row.extend(' ' * (num_col - len(row)))
+    return search_matrix, num_row, num_col, box_pos, goal_pos, player_pos
+
+
+def load_level(level):
+    """
+    Load input matrix used for search functions.
+    @param level: path of a level file holding one board
+    @return: the same values as parse_level
+    """
+    with open(level, 'r') as f:
+        return parse_level(f)
+
+
+def read_level_text(file_name, offset=0):
+    """
+    Read one board of a level file
+    @param file_name: path of the level file
+    @param offset: the byte offset of the first row of the board (see LevelCollection)
+    @return: the rows of the board, with their ends of line, up to the first line which is not a board row
+    """
+    rows = []
+    with open(file_name, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            line = raw.decode("utf-8", "replace")
+            if not is_board_line(line):
+                break
+            rows.append(line)
+    return "".join(rows)
+
+
+class LevelCollection:
+    def __init__(self, source):
+        """
+        Index the levels of a directory of level files (one board per file, like the bundled packs) or of a
+        collection file in the XSB/SOK format (boards separated by blank, comment and "Title:" lines). Only the
+        positions and the titles of the levels are kept: a level is read and parsed when it is asked for.
+        @param source: path of the directory or of the collection file
+        """
+        self.source = source
+        self.entries = []  # tuples (file name, byte offset of the first row, title)
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.endswith(".txt"):
+                    self.entries.append((os.path.join(source, name), 0, os.path.splitext(name)[0]))
+        else:
+            self.index(source)
+
+    def index(self, file_name):
+        """
+        Find the levels of a collection file in one streaming pass. The title of a level is its "Title:" line (after
+        the board), else the last comment or text line before the board, else the name of the file when it holds only
+        one level, else its number.
+        @param file_name: path of the collection file
+        """
+        entries = []  # [file name, offset, title] while indexing
+        offset, in_board, pending = 0, False, None
+        with open(file_name, 'rb') as f:
+            for raw in f:
+                line = raw.decode("utf-8", "replace")
+                if is_board_line(line):
+                    if not in_board:
+                        entries.append([file_name, offset, pending])
+                        pending, in_board = None, True
+                else:
+                    in_board = False
+                    text = line.strip().lstrip(";").strip()
+                    key, colon, value = text.partition(":")
+                    if colon and key.lower() == "title" and entries:
+                        entries[-1][2] = value.strip()
+                    elif text and not (colon and " " not in key):  # "Author: ..." and the like describe the file
+                        pending = text
+                offset += len(raw)
+        if len(entries) == 1 and entries[0][2] is None:  # a single level file is named after the file
+            entries[0][2] = os.path.splitext(os.path.basename(file_name))[0]
+        self.entries = [(name, start, title or "Level %d" % (n + 1)) for n, (name, start, title) in enumerate(entries)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def titles(self):
+        """
+        @return: the list of the titles of the levels
+        """
+        return [title for name, start, title in self.entries]
+
+    def text(self, n):
+        """
+        @param n: the number of a level (0 for the first)
+        @return: the rows of the board of the level, as read_level_text
+        """
+        name, start, title = self.entries[n]
+        return read_level_text(name, start)
+
+    def level(self, n):
+        """
+        @param n: the number of a level (0 for the first)
+        @return: the level parsed by parse_level
+        """
+        return parse_level(self.text(n).splitlines())
+
+    def __iter__(self):
+        """
+        @return: a generator of the parsed levels, reading one level at a time
+        """
+        return (self.level(n) for n in range(len(self)))
+
+
+# Search classes selectable by name (used by the headless tools)
+ALGORITHMS = {"bfs": BFS, "bidirectional": BidirectionalBFS, "astar": AStar, "idastar": IDAStar,
+              "hdastar": ParallelAStar, "portfolio": Portfolio}
@@ -0,0 +1,26 @@
+"""Shared fixtures of the tests
+    The modules of the game and the level packs live in the Code directory: it is put on sys.path, and every test
+    runs with it as the current directory, like main.py and batch.py do.
+"""
+import os
+import sys
+
+import pytest
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIR)
+
+
+@pytest.fixture(autouse=True)
+def code_dir(monkeypatch):
+    monkeypatch.chdir(CODE_DIR)
+
+
+def level_args(level_file):
+    """
+    @param level_file: path of a level file, relative to the Code directory
+    @return: the positional arguments of the search classes for the level
+    """
+    from solver import load_level
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = load_level(os.path.join(CODE_DIR, level_file))
+    return num_row, num_col, matrix, box_pos, goal_pos, player_pos
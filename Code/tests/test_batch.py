@@ -0,0 +1,57 @@
+"""Tests of the batch runner on level files and collection files"""
+import os
+from batch import expand_packs, solve_level
+from verify import verify_all, verify_path
+from solver import GameModel, parse_level, read_level_text
+
+ONE_LEVEL = """; a collection file holding a single level
+Author: nobody
+
+#########
+#  ###  #
+# $ * $ #
+#   +   #
+### .$###
+  # . #
+  #####
+Title: The only one
+"""
+
+
+def test_one_level_collection(tmp_path):
+    pack = tmp_path / "single.sok"
+    pack.write_text(ONE_LEVEL)
+    levels = expand_packs([str(pack)])
+    assert levels == [(str(pack), levels[0][1], "The only one", 0)]
+    result = solve_level(levels[0], "astar", {"packed": True})
+    assert (result["pack"], result["level"], result["source"]) == ("single.sok", "The only one", str(pack) + "#0")
+    assert result["solved"]
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(
+        read_level_text(str(pack), levels[0][1]).splitlines())
+    assert verify_path(GameModel(num_row, num_col, matrix, box_pos, goal_pos, player_pos), result["path"])["solved"]
+
+
+def test_untitled_level_file_named_after_file():
+    levels = expand_packs(["Micro Cosmos/Level_01.txt"])
+    assert levels == [("Micro Cosmos/Level_01.txt", 0, "Level_01", 0)]
+
+
+def test_directory_pack():
+    levels = expand_packs(["Micro Cosmos"])
+    assert levels[0] == "Micro Cosmos/Level_01.txt"
+    result = solve_level(levels[0], "bfs", {"packed": True})
+    assert (result["pack"], result["level"], result["source"]) == ("Micro Cosmos", "Level_01", levels[0])
+    assert result["solved"]
+
+
+def test_verify_duplicate_titles(tmp_path):
+    pack = tmp_path / "twins.sok"
+    other = ONE_LEVEL.replace("#   +   #", "#  +    #")  # another board under the same title
+    pack.write_text(ONE_LEVEL + "\n" + other)
+    levels = expand_packs([str(pack)])
+    assert [level[2] for level in levels] == ["The only one", "The only one"]
+    rows = [solve_level(level, "astar", {"packed": True}) for level in levels]
+    assert rows[0]["path"] != rows[1]["path"]
+    results = verify_all([dict(row, source=os.path.relpath(row["source"], str(tmp_path))) for row in rows],
+                         str(tmp_path), workers=1)
+    assert all(result["solved"] for result in results)
@@ -0,0 +1,33 @@
+"""Tests of the benchmark comparison against a baseline"""
+from bench import compare, run_benchmark
+
+
+def summary(time, time_min, time_max, expanded=1000, status="solved"):
+    return {"config": "astar", "pack": "Micro Cosmos", "level": "Level_01", "status": status, "expanded": expanded,
+            "time": time, "time_min": time_min, "time_max": time_max}
+
+
+def test_noise_is_not_a_regression():
+    baseline = [summary(1.0, 0.8, 1.3)]
+    assert compare([summary(1.3, 0.9, 1.6)], baseline) == ([], [])
+    # even a large change of the median is noise while the trials overlap
+    assert compare([summary(1.8, 1.2, 1.9)], baseline) == ([], [])
+
+
+def test_regressions():
+    baseline = [summary(1.0, 0.9, 1.1)]
+    regressions, improvements = compare([summary(2.0, 1.9, 2.1)], baseline)
+    assert [message.split()[0] for *key, message in regressions] == ["time"]
+    regressions, improvements = compare([summary(1.0, 0.9, 1.1, expanded=1300)], baseline)
+    assert [message.split()[0] for *key, message in regressions] == ["expanded"]
+    regressions, improvements = compare([summary(1.0, 0.9, 1.1, status="time")], baseline)
+    assert regressions == [("astar", "Micro Cosmos", "Level_01", "time, was solved")]
+    regressions, improvements = compare([summary(0.4, 0.3, 0.5, expanded=500)], baseline)
+    assert regressions == [] and len(improvements) == 2
+
+
+def test_run_benchmark():
+    results = run_benchmark(["Micro Cosmos/Level_01.txt"], ["astar"], trials=2)
+    assert [(row["config"], row["level"], row["status"], row["steps"]) for row in results] == [
+        ("astar", "Level_01", "solved", 49)]
+    assert results[0]["time_min"] <= results[0]["time"] <= results[0]["time_max"]
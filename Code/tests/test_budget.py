@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from solver import AStar, BFS, Budget, IDAStar, ParallelAStar
+from tests.conftest import level_args
+
+# Micro Cosmos/Level_02 takes several seconds in step mode, far more than the limits below
+LEVEL = "Micro Cosmos/Level_02.txt"
+
+
+@pytest.mark.parametrize("search_class, options", [
+    (BFS, {"packed": True}),
+    (AStar, {"packed": True}),
+    (AStar, {}),
+    (IDAStar, {"packed": True}),
+    (ParallelAStar, {"workers": 2}),
+])
+def test_time_limit(search_class, options):
+    budget = Budget(time_limit=0.5)
+    start = time.monotonic()
+    path, expanded, explored = search_class(*level_args(LEVEL), budget=budget, **options).search()
+    assert path == ["Budget exceeded"]
+    assert budget.reason == "time"
+    assert time.monotonic() - start < 10
+
+
+def test_node_limit():
+    budget = Budget(node_limit=1000)
+    path, expanded, explored = BFS(*level_args(LEVEL), packed=True, budget=budget).search()
+    assert path == ["Budget exceeded"]
+    assert budget.reason == "nodes"
+    assert expanded == 1000
+
+
+def test_cancel():
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    budget = Budget(cancel=cancel)
+    path, expanded, explored = AStar(*level_args(LEVEL), packed=True, budget=budget).search()
+    assert path == ["Budget exceeded"]
+    assert budget.reason == "cancelled"
+
+
+def test_always_checks_between_multiples():
+    # ParallelAStar passes a sum of counters which jumps by batches and rarely lands on a multiple of check_every
+    budget = Budget(time_limit=0, check_every=256)
+    budget.start()
+    time.sleep(0.01)
+    assert not budget.exceeded(1000)
+    assert budget.exceeded(1000, always=True)
+    assert budget.reason == "time"
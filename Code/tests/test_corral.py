@@ -0,0 +1,45 @@
+"""Tests of the corral deadlock pruning and of the PI-corral move restriction"""
+import pytest
+
+from solver import AStar, BFS, GameModel, parse_level
+from tests.conftest import level_args
+
+# the right part of the level is a corral behind the boxes at (2, 5), (2, 6) and (3, 5): none of its pushes can
+# bring these boxes to goals, but no freeze deadlock shows it
+DEAD = """#########
+#@ ###  #
+# $ .$$ #
+#   .$  #
+### . ###
+  # . #
+  #####"""
+
+
+@pytest.mark.parametrize("level", ["Micro Cosmos/Level_01.txt", "Micro Cosmos/Level_04.txt",
+                                   "Micro Cosmos/Level_05.txt"])
+@pytest.mark.parametrize("algorithm", [BFS, AStar])
+def test_corral_keeps_optimal_pushes(algorithm, level):
+    args = level_args(level)
+    pushes = []
+    for corral in (False, True):
+        path, expanded, explored = algorithm(*args, mode="push", corral=corral).search()
+        model = GameModel(*args)
+        pushes.append(model.replay(path))
+        assert model.is_solved()
+    assert pushes[0] == pushes[1]
+
+
+def test_corral_deadlock_is_pruned():
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(DEAD.splitlines())
+    args = (num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+    search = AStar(*args, mode="push", corral=True, stats=True)
+    state = search.initial_state
+    corral_boxes, barrier, interior = search.find_pi_corral(state.box_pos, search.reachable(state.box_pos,
+                                                                                             state.player_pos))
+    assert corral_boxes == search.pack({(2, 5), (2, 6), (3, 5)})
+    assert search.push_successors(state) == []
+    assert search.stats.counters["prune_corral"] == 1
+    # without corral pruning the pushes are generated, and the search has to try them all to find the deadlock
+    plain = AStar(*args, mode="push")
+    assert plain.push_successors(plain.initial_state)
+    assert search.search()[0] == ["Impossible"]
@@ -0,0 +1,70 @@
+"""Tests of the database of learned deadlock patterns"""
+import pytest
+
+from solver import AStar, DeadlockDatabase, PackedState, State
+from tests.conftest import level_args
+
+LEVEL = "Micro Cosmos/Level_01.txt"
+
+
+def test_candidates_by_cell(tmp_path):
+    database = DeadlockDatabase(str(tmp_path), "level")
+    database.add(0b0110, 0)
+    database.add(0b1000, 0)
+    assert database.candidates(0b1110) == [(0b0110, 0), (0b1000, 0)]
+    assert database.candidates(0b1110, 2) == [(0b0110, 0)]
+    assert database.candidates(0b1110, 0) == []
+    assert DeadlockDatabase(str(tmp_path), "level").by_cell == database.by_cell  # read back from the file
+
+
+def test_learned_push_is_pruned(tmp_path):
+    # the push down of the box at (2, 2), from (1, 2), is recorded as a deadlock: both modes must refuse it
+    num_row, num_col, matrix, box_pos, goal_pos, player_pos = level_args(LEVEL)
+    plain = AStar(num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+    new_box_pos = set(box_pos) - {(2, 2)} | {(3, 2)}
+    boxes = plain.pack(new_box_pos)
+    DeadlockDatabase(str(tmp_path), plain.fingerprint()).add(boxes, plain.normalize(boxes, plain.index((2, 2))))
+    for packed in (False, True):
+        search = AStar(num_row, num_col, matrix, box_pos, goal_pos, player_pos, packed=packed,
+                       deadlock_db=str(tmp_path), stats=True)
+        if packed:
+            state = PackedState(search.pack(box_pos), search.index((1, 2)), None)
+        else:
+            state = State(set(box_pos), (1, 2), None)
+        assert plain.can_go_down(State(set(box_pos), (1, 2), None))
+        assert not search.can_go_down(state)
+        assert search.can_go_left(state)
+        assert search.stats.counters["prune_learned"] == 1
+
+
+def test_blocked_push_is_not_learned(tmp_path):
+    # the box at (2, 2) can't be pushed down onto the box at (3, 2): the move is illegal, not a learned deadlock
+    num_row, num_col, matrix, box_pos, goal_pos, player_pos = level_args(LEVEL)
+    plain = AStar(num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+    blocked = set(box_pos) | {(3, 2)}
+    for pattern in ({(2, 6), (4, 5)}, {(3, 2)}):
+        boxes = plain.pack(pattern)
+        DeadlockDatabase(str(tmp_path), plain.fingerprint()).add(boxes, plain.normalize(boxes, plain.index((2, 2))))
+    for packed in (False, True):
+        search = AStar(num_row, num_col, matrix, blocked, goal_pos, player_pos, packed=packed,
+                       deadlock_db=str(tmp_path), stats=True)
+        if packed:
+            state = PackedState(search.pack(blocked), search.index((1, 2)), None)
+        else:
+            state = State(set(blocked), (1, 2), None)
+        assert not search.can_go_down(state)
+        assert search.stats.counters["prune_learned"] == 0
+
+
+@pytest.mark.parametrize("options", [{}, {"packed": True}, {"mode": "push"}])
+def test_every_search_learns(tmp_path, options):
+    # without corral pruning too, the freeze deadlocks met by the first run are recorded and prune the second run
+    args = level_args(LEVEL)
+    first = AStar(*args, deadlock_db=str(tmp_path), stats=True, **options)
+    path, expanded, explored = first.search()
+    assert first.stats.counters["learned"] > 0
+    assert len(DeadlockDatabase(str(tmp_path), first.fingerprint())) == first.stats.counters["learned"]
+    second = AStar(*args, deadlock_db=str(tmp_path), stats=True, **options)
+    assert len(second.search()[0]) == len(path)
+    assert second.stats.counters["prune_learned"] > 0
+    assert second.stats.counters["learned"] == 0
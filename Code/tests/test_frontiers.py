@@ -0,0 +1,35 @@
+"""Tests of the frontier classes selectable by name"""
+import pytest
+
+from solver import FRONTIERS, AStar, BFS, GameModel
+from tests.conftest import level_args
+
+LEVEL = "Micro Cosmos/Level_01.txt"
+
+
+@pytest.mark.parametrize("frontier", sorted(FRONTIERS))
+@pytest.mark.parametrize("algorithm", [BFS, AStar])
+def test_progress_and_stats_with_every_frontier(algorithm, frontier):
+    if frontier == "bucket" and algorithm is BFS:
+        pytest.skip("the bucket frontier needs the f values of A*")
+    calls = []
+    args = level_args(LEVEL)
+    search = algorithm(*args, packed=True, frontier=frontier, stats=True,
+                       progress=lambda expanded, explored, size: calls.append(size))
+    path, expanded, explored = search.search()
+    model = GameModel(*args)
+    model.replay(path)  # BFS on a priority frontier finds a longer solution, but a valid one
+    assert model.is_solved()
+    assert calls and all(size >= 0 for size in calls)
+    assert search.stats.max_frontier > 0
+
+
+def test_bucket_frontier_weight():
+    args = level_args(LEVEL)
+    with pytest.raises(ValueError):
+        AStar(*args, mode="push", frontier="bucket", weight=1.5)
+    for frontier, weight in (("bucket", 2), ("heap", 1.5)):
+        path, expanded, explored = AStar(*args, mode="push", frontier=frontier, weight=weight).search()
+        model = GameModel(*args)
+        model.replay(path)
+        assert model.is_solved()
@@ -0,0 +1,14 @@
+from solver import Budget, GameModel, ParallelAStar
+from tests.conftest import level_args
+
+
+def test_many_workers_terminate():
+    # every run must detect the end of the search: lost batch counters used to leave the parent waiting forever
+    args = level_args("Micro Cosmos/Level_05.txt")
+    for run in range(4):
+        budget = Budget(time_limit=120)
+        path, expanded, explored = ParallelAStar(*args, workers=8, budget=budget).search()
+        assert budget.reason is None
+        board = GameModel(*args)
+        board.replay(path)
+        assert board.is_solved()
@@ -0,0 +1,76 @@
+"""Tests of the level parser and of the XSB/SOK collection files"""
+from solver import LevelCollection, is_board_line, load_level, parse_level
+
+COLLECTION = """; Two levels in the SOK format
+Author: nobody
+Collection: tests
+
+; Dashes
+--####
+###--#
+#-$@.#
+######
+Title: First
+
+; the title of this one comes from this comment
+#####
+#*+ #
+#####
+
+_#####_
+##$.@#
+#####
+"""
+
+
+def test_is_board_line():
+    assert is_board_line("  ###\n")
+    assert is_board_line("#-$@.#\r\n")
+    assert not is_board_line("\n")
+    assert not is_board_line("Title: First\n")
+    assert not is_board_line("; # a comment\n")
+    assert not is_board_line("   \n")
+
+
+def test_parse_level_xsb():
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(["#####\n", "#@$.#\n", "# *+  #\n",
+                                                                            "#######"])
+    assert (num_row, num_col) == (4, 7)
+    assert all(len(row) == num_col for row in matrix)
+    assert matrix[1] == list("#@$.#  ")
+    assert box_pos == {(1, 2), (2, 2)}
+    assert goal_pos == {(1, 3), (2, 2), (2, 3)}
+    assert player_pos == (2, 3)
+
+
+def test_parse_level_sok_floor():
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(["--####", "###--#", "#-$@.#", "######"])
+    assert matrix[0] == list("  ####")
+    assert matrix[2] == list("# $@.#")
+    assert (box_pos, goal_pos, player_pos) == ({(2, 2)}, {(2, 4)}, (2, 3))
+
+
+def test_load_level():
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = load_level("Micro Cosmos/Level_01.txt")
+    assert (num_row, len(box_pos), len(goal_pos)) == (7, 4, 4)
+    assert matrix[player_pos[0]][player_pos[1]] == '+'
+
+
+def test_collection(tmp_path):
+    file_name = tmp_path / "tests.sok"
+    file_name.write_text(COLLECTION)
+    collection = LevelCollection(str(file_name))
+    assert len(collection) == 3
+    assert collection.titles() == ["First", "the title of this one comes from this comment", "Level 3"]
+    assert collection.text(1) == "#####\n#*+ #\n#####\n"
+    levels = list(collection)
+    assert levels[0] == parse_level(["--####", "###--#", "#-$@.#", "######"])
+    assert levels[1][3:] == ({(1, 1)}, {(1, 1), (1, 2)}, (1, 2))
+    assert levels[2][3:] == ({(1, 2)}, {(1, 3)}, (1, 4))
+
+
+def test_directory_collection():
+    collection = LevelCollection("Micro Cosmos")
+    assert len(collection) == 40
+    assert collection.titles()[:2] == ["Level_01", "Level_02"]
+    assert collection.level(0) == load_level("Micro Cosmos/Level_01.txt")
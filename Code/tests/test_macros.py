@@ -0,0 +1,45 @@
+"""Tests of the tunnel and goal room macro moves"""
+import pytest
+
+from solver import AStar, GameModel, parse_level
+from tests.conftest import level_args
+
+# the player and the box are in a tunnel of one cell wide, from (1, 1) to (1, 5)
+TUNNEL = """##########
+#@$     .#
+######   #
+     #   #
+     #####"""
+
+
+def test_tunnel_macro():
+    matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(TUNNEL.splitlines())
+    args = (num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+    search = AStar(*args, mode="push", macros=True)
+    assert [num_col + y for y in range(1, 6)] == [
+        cell for cell in search.floor_cells if search.tunnel[1][cell]]
+    successors = search.push_successors(search.initial_state)
+    assert len(successors) == 1
+    # a single successor pushes the box to the end of the tunnel
+    assert successors[0].pushes == tuple((x * num_col + y, 1) for x, y in [(1, 2), (1, 3), (1, 4), (1, 5)])
+    assert successors[0].box_pos == search.pack({(1, 6)})
+    plain = AStar(*args, mode="push")
+    assert [state.pushes for state in plain.push_successors(plain.initial_state)] == [((num_col + 2, 1),)]
+
+
+@pytest.mark.parametrize("level", ["Micro Cosmos/Level_38.txt", "Mini Cosmos/Level_24.txt"])
+def test_solve_with_macros(level):
+    args = level_args(level)
+    search = AStar(*args, mode="push", macros=True)
+    macro, fired = search.macro, []
+
+    def counted_macro(pushes, box_pos):
+        result = macro(pushes, box_pos)
+        fired.append(len(result[0]) > 1)
+        return result
+    search.macro = counted_macro
+    path, expanded, explored = search.search()
+    assert any(fired)
+    model = GameModel(*args)
+    model.replay(path)
+    assert model.is_solved()
@@ -0,0 +1,48 @@
+"""Tests of the minimum cost matching and of the matching heuristic"""
+import itertools
+import random
+
+import pytest
+
+from solver import INF, AStar, GameModel, min_cost_matching
+from tests.conftest import level_args
+
+
+def brute_force(cost):
+    n, m = len(cost), len(cost[0])
+    best = INF
+    for columns in itertools.permutations(range(m), n):
+        costs = [cost[i][j] for i, j in enumerate(columns)]
+        if INF not in costs:
+            best = min(best, sum(costs))
+    return best
+
+
+def test_matching_against_brute_force():
+    rng = random.Random(7)
+    for trial in range(300):
+        n = rng.randint(1, 5)
+        m = rng.randint(n, 6)
+        cost = [[INF if rng.random() < 0.25 else rng.randint(0, 20) for j in range(m)] for i in range(n)]
+        assert min_cost_matching(cost) == brute_force(cost), cost
+
+
+def test_matching_special_cases():
+    assert min_cost_matching([[1, 2], [INF, INF]]) == INF  # a box which can't reach any goal
+    assert min_cost_matching([[1, INF], [2, INF]]) == INF  # two boxes which can only reach the same goal
+    assert min_cost_matching([[3, 1], [1, 3]]) == 2  # the nearest goal of both boxes is not the best assignment
+    assert min_cost_matching([[1], [2]]) == INF  # more boxes than goals
+    assert min_cost_matching([[4, 2, 7]]) == 2
+
+
+@pytest.mark.parametrize("level", ["Micro Cosmos/Level_01.txt", "Micro Cosmos/Level_04.txt",
+                                   "Micro Cosmos/Level_28.txt"])
+def test_matching_heuristic_is_optimal(level):
+    args = level_args(level)
+    pushes = []
+    for heuristic in ("distance", "matching"):
+        path, expanded, explored = AStar(*args, mode="push", heuristic=heuristic).search()
+        model = GameModel(*args)
+        pushes.append(model.replay(path))
+        assert model.is_solved()
+    assert pushes[0] == pushes[1]
@@ -0,0 +1,52 @@
+"""Tests that the move rules of the search classes agree with the ones of GameModel
+
+The search classes keep their own checks of a step (inlined, on their own state representations, and mixed with the
+deadlock pruning), so random walks compare them with GameModel, the reference of the GUI and of verify.py.
+"""
+import random
+
+import pytest
+
+from solver import BFS, GameModel, PackedState, State
+from tests.conftest import level_args
+
+LEVELS = ["Micro Cosmos/Level_%02d.txt" % n for n in range(1, 6)]
+DIRECTIONS = {"U": "up", "D": "down", "L": "left", "R": "right"}
+
+
+@pytest.mark.parametrize("level", LEVELS)
+@pytest.mark.parametrize("packed", [False, True])
+def test_search_rules_agree_with_game_model(level, packed):
+    args = level_args(level)
+    search = BFS(*args, packed=packed)
+    model = GameModel(*args)
+    rng = random.Random(level)
+    for walk in range(300):
+        boxes = {divmod(box, model.num_col) for box in model.boxes}
+        player = divmod(model.player, model.num_col)
+        zobrist = search.zobrist_hash(model.boxes, model.player)
+        if packed:
+            state = PackedState(search.pack(boxes), model.player, None, zobrist=zobrist)
+        else:
+            state = State(boxes, player, None, zobrist=zobrist)
+        possible = []
+        for direction, name in DIRECTIONS.items():
+            kind = model.can_move(direction)
+            if getattr(search, "can_go_" + name)(state):
+                # the search may prune more (deadlocks), never less, and must reach the same board
+                assert kind is not None
+                new_state = getattr(search, "go_" + name)(state)
+                board = model.copy()
+                board.move(direction)
+                if packed:
+                    assert (new_state.box_pos, new_state.player_pos) == (search.pack(
+                        {divmod(box, model.num_col) for box in board.boxes}), board.player)
+                else:
+                    assert (new_state.box_pos, new_state.player_pos) == (
+                        {divmod(box, model.num_col) for box in board.boxes}, divmod(board.player, model.num_col))
+                possible.append(direction)
+            elif kind == "step":
+                pytest.fail("%s refused a step without a push at %s" % (name, player))
+        if not possible:
+            break
+        model.move(rng.choice(possible))
@@ -0,0 +1,43 @@
+"""Solve-and-verify tests of every algorithm in every mode on Micro Cosmos levels"""
+import pytest
+
+from solver import ALGORITHMS, Budget, GameModel, Portfolio
+from tests.conftest import level_args
+
+# the shortest solutions of the levels, in steps
+OPTIMAL = {"Micro Cosmos/Level_28.txt": 73, "Micro Cosmos/Level_29.txt": 39}
+MODES = {"step": {}, "packed": {"packed": True}, "push": {"mode": "push"}}
+# the algorithms finding a shortest solution in steps (in push mode they minimize the pushes instead)
+OPTIMAL_ALGORITHMS = {"bfs", "astar", "idastar", "hdastar"}
+OPTIONS = {"idastar": {"cache_size": 100000}, "hdastar": {"workers": 2}}
+
+
+def verify(args, path):
+    model = GameModel(*args)
+    model.replay(path)
+    return model.is_solved()
+
+
+@pytest.mark.parametrize("level", sorted(OPTIMAL))
+@pytest.mark.parametrize("mode", sorted(MODES))
+@pytest.mark.parametrize("algorithm", sorted(set(ALGORITHMS) - {"portfolio"}))
+def test_solve(algorithm, mode, level):
+    if algorithm == "bidirectional" and mode != "push":
+        pytest.skip("the bidirectional search only has the push mode")
+    args = level_args(level)
+    budget = Budget(time_limit=60)
+    options = dict(MODES[mode], budget=budget, **OPTIONS.get(algorithm, {}))
+    path, expanded, explored = ALGORITHMS[algorithm](*args, **options).search()
+    assert budget.reason is None
+    assert verify(args, path)
+    if algorithm in OPTIMAL_ALGORITHMS and mode != "push":
+        assert len(path) == OPTIMAL[level]
+    else:
+        assert len(path) >= OPTIMAL[level]
+
+
+@pytest.mark.parametrize("level", sorted(OPTIMAL))
+def test_portfolio(level):
+    args = level_args(level)
+    path, expanded, explored = Portfolio(*args, deadline=60).search()
+    assert verify(args, path)
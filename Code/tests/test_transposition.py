@@ -0,0 +1,17 @@
+"""Tests of A* with a bounded transposition table"""
+from solver import AStar, GameModel
+from tests.conftest import level_args
+
+LEVEL = "Micro Cosmos/Level_01.txt"
+
+
+def test_small_table_keeps_solution_quality():
+    args = level_args(LEVEL)
+    unbounded, _, _ = AStar(*args, packed=True).search()
+    search = AStar(*args, packed=True, tt_size=100)
+    path, expanded, explored = search.search()
+    # evicted states are searched again, so the search is longer, but the solution is still an optimal one
+    assert len(path) == len(unbounded)
+    model = GameModel(*args)
+    model.replay(path)
+    assert model.is_solved()
@@ -0,0 +1,159 @@
+"""Headless solution verifier
+    Replays LURD paths (upper or lower case) on a GameModel and reports whether they solve the level, with the
+    number of moves and pushes. Either checks paths given on the command line against one level, or every solved
+    row of a results file written by batch.py (CSV or JSON) with a pool of worker processes.
+
+    Example:
+        python verify.py "Micro Cosmos/Level_01.txt" --path RRUULLDD
+        python verify.py --results results.json --csv verified.csv
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import json
+import os
+import sys
+from solver import GameModel, LevelCollection, parse_level, read_level_text
+
+FIELDS = ["pack", "level", "algorithm", "valid", "solved", "moves", "pushes", "error"]
+
+
+def verify_path(model, path):
+    """
+    Replay a path on a copy of a board
+    @param model: the GameModel of the level at its initial state (left unchanged)
+    @param path: a string or a list of U, D, L and R (upper or lower case)
+    @return: a dictionary with valid (every step is possible), solved (valid and every box ends on a goal), moves
+    (the number of steps made), pushes and error (the message of the first illegal step, "" if there is none)
+    """
+    board = model.copy()
+    try:
+        board.replay(path)
+        error = ""
+    except ValueError as exception:
+        error = str(exception)
+    return {
+        "valid": not error,
+        "solved": not error and board.is_solved(),
+        "moves": board.steps,
+        "pushes": board.pushes,
+        "error": error,
+    }
+
+
+def verify_rows(level_file, rows):
+    """
+    Verify the rows of one level. Runs in a worker process, so it only takes and returns picklable values.
+    @param level_file: path of the level file, or an entry of a collection file (see batch.expand_packs)
+    @param rows: the result dictionaries of the level (see batch.FIELDS)
+    @return: the list of dictionaries with the fields listed in FIELDS, in the order of rows
+    """
+    if isinstance(level_file, tuple):
+        matrix, num_row, num_col, box_pos, goal_pos, player_pos = parse_level(
+            read_level_text(level_file[0], level_file[1]).splitlines())
+        model = GameModel(num_row, num_col, matrix, box_pos, goal_pos, player_pos)
+    else:
+        model = GameModel.load(level_file)
+    verified = []
+    for row in rows:
+        result = {"pack": row["pack"], "level": row["level"], "algorithm": row["algorithm"]}
+        result.update(verify_path(model, row["path"]))
+        verified.append(result)
+    return verified
+
+
+def level_of(row, levels_dir=".", collections=None):
+    """
+    Find the level of a result row
+    @param row: a result dictionary (see batch.FIELDS)
+    @param levels_dir: the directory the paths of the results are relative to
+    @param collections: optional dictionary of the LevelCollection of every collection file already indexed, by file
+    name (filled in)
+    @return: the path of the level file, or the entry of a collection file (see batch.expand_packs), found from the
+    source column ("file" or "file#number"); results without it (written before it existed) name a level file by
+    their pack and level columns
+    """
+    source = row.get("source")
+    if not source:
+        return os.path.join(levels_dir, row["pack"], row["level"] + ".txt")
+    file_name, sharp, number = source.rpartition("#")
+    if not sharp or not number.isdigit():
+        return os.path.join(levels_dir, source)
+    file_name = os.path.join(levels_dir, file_name)
+    collections = {} if collections is None else collections
+    if file_name not in collections:
+        collections[file_name] = LevelCollection(file_name)
+    return collections[file_name].entries[int(number)] + (int(number),)
+
+
+def read_results(file_name):
+    """
+    Read a results file written by batch.py
+    @param file_name: a .json file, any other extension is read as CSV
+    @return: the list of the rows which have a path (the solved levels)
+    """
+    with open(file_name, newline="") as f:
+        rows = json.load(f) if file_name.endswith(".json") else list(csv.DictReader(f))
+    return [row for row in rows if row.get("path")]
+
+
+def verify_all(rows, levels_dir=".", workers=None):
+    """
+    Verify the rows of a results file across a process pool, one task per level
+    @param rows: the result dictionaries (see batch.FIELDS)
+    @param levels_dir: the directory the level files and the collection files of the results are relative to
+    @param workers: number of worker processes (None means one per CPU)
+    @return: the list of verified dictionaries (see FIELDS), in the order of rows
+    """
+    by_level = {}
+    collections = {}  # the collection files indexed so far
+    for n, row in enumerate(rows):
+        by_level.setdefault(level_of(row, levels_dir, collections), []).append(n)
+    results = [None] * len(rows)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {level_file: pool.submit(verify_rows, level_file, [rows[n] for n in indexes])
+                   for level_file, indexes in by_level.items()}
+        for level_file, future in futures.items():
+            for n, result in zip(by_level[level_file], future.result()):
+                results[n] = result
+    return results
+
+
+def write_rows(results, f):
+    writer = csv.DictWriter(f, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that Sokoban solution paths solve their levels.")
+    parser.add_argument("level", nargs="?", help="a level file, checked against the paths given with --path")
+    parser.add_argument("-p", "--path", action="append", default=[], help="a LURD path (repeatable)")
+    parser.add_argument("-r", "--results", help="a results file of batch.py (CSV or JSON) to verify")
+    parser.add_argument("--levels-dir", default=".",
+                        help="the directory the level files of the results file are relative to")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--csv", help="write the verification to this CSV file instead of the standard output")
+    args = parser.parse_args(argv)
+    if (args.level is None) == (args.results is None):
+        parser.error("give either a level file with --path, or --results")
+
+    if args.results:
+        results = verify_all(read_results(args.results), args.levels_dir, args.workers)
+    else:
+        model = GameModel.load(args.level)
+        pack, level = os.path.split(os.path.splitext(args.level)[0])
+        results = [dict(pack=os.path.basename(pack), level=level, algorithm="", **verify_path(model, path))
+                   for path in args.path]
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            write_rows(results, f)
+    else:
+        write_rows(results, sys.stdout)
+    failed = [result for result in results if not result["solved"]]
+    print("%d paths verified, %d failed" % (len(results), len(failed)), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())